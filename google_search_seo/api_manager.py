@@ -0,0 +1,492 @@
+# api_manager.py
+
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple, Optional
+
+from google_search_seo.instrumentation import metrics
+from google_search_seo.transport import SearchClientTransport, SessionTransport
+
+
+# Error messages SerpAPI returns for conditions that clear up on their own
+RETRYABLE_ERROR_MARKERS = ("rate limit", "too many requests", "try again", "timed out", "temporarily")
+QUOTA_ERROR_MARKERS = ("run out of searches", "plan searches")
+# ... and the one error that is a real answer: the query has no results, which is worth caching like any other
+NO_RESULTS_ERROR_MARKERS = ("hasn't returned any results",)
+
+
+# Google serves ten organic results per page; page n starts at offset n * RESULTS_PER_PAGE
+RESULTS_PER_PAGE = 10
+RESULT_KEYS = ('position', 'title', 'link', 'displayed_link', 'snippet', 'snippet_highlighted_words')
+
+
+class SearchResult(NamedTuple):
+    """One organic result, tagged with the query that produced it. Tuples keep per-result overhead
+    small and let a whole batch of them be materialized into a single DataFrame."""
+    input_restaurant: str
+    input_city: Optional[str]
+    position: Optional[int]
+    title: Optional[str]
+    link: Optional[str]
+    displayed_link: Optional[str]
+    snippet: Optional[str] = None
+    snippet_highlighted_words: Optional[list] = None
+
+
+def records_to_frame(record_lists):
+    """Builds one DataFrame from per-account lists of SearchResult, with a row_id column giving
+    each result's position in record_lists."""
+    import numpy as np
+    import pandas as pd
+
+    lengths = [len(records) for records in record_lists]
+    flat_records = [record for records in record_lists for record in records]
+
+    results_df = pd.DataFrame.from_records(flat_records, columns=SearchResult._fields)
+    results_df.insert(0, 'row_id', np.repeat(np.arange(len(record_lists)), lengths))
+    return results_df
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a query has no usable cached response."""
+
+
+class SearchBudgetExceeded(Exception):
+    """Raised before a search that would go past the configured budget, or when the plan is exhausted."""
+
+
+class RetryableSearchError(Exception):
+    """A transient failure that is worth retrying after a backoff."""
+
+
+class SearchError(Exception):
+    """An error payload no retry will fix (invalid key, suspended account, bad parameter)."""
+
+
+class TokenBucket():
+    """Thread-safe token bucket: allows bursts of up to capacity calls, refilled at rate tokens per second."""
+
+    def __init__(self, rate, capacity=1):
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+
+    def acquire(self):
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache():
+    """SQLite-backed store of raw SerpAPI response dicts, keyed by a hash of the normalized query params."""
+
+    def __init__(self,
+                 path,
+                 ttl_seconds=None,
+                 max_entries=None,
+                 access_flush_size=1000,
+                 access_flush_seconds=5.0):
+
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.access_flush_size = access_flush_size
+        self.access_flush_seconds = access_flush_seconds
+        self._lock = threading.Lock()
+
+        # Hits only note their access time here; it is written in batches instead of one commit per hit
+        self._pending_access = {}
+        self._access_flushed_at = time.monotonic()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                params TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+
+    @staticmethod
+    def make_key(params):
+
+        # The api key never changes the response, so it must not change the cache key either; queries
+        # are normalized like account keys, so rows differing only in case or spacing share an entry
+        normalized = {
+            key: ' '.join(str(value).lower().split()) if key in ("q", "location") else value
+            for key, value in params.items()
+            if key != "api_key" and value is not None
+        }
+        payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+    def get(self, key):
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            response, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._pending_access[key] = now
+            if (len(self._pending_access) >= self.access_flush_size
+                    or time.monotonic() - self._access_flushed_at >= self.access_flush_seconds):
+                self._flush_access()
+                self._conn.commit()
+
+        return json.loads(response)
+
+
+    def _flush_access(self):
+
+        # Callers hold the lock and commit
+        if self._pending_access:
+            self._conn.executemany("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                                   [(accessed_at, key) for key, accessed_at in self._pending_access.items()])
+            self._pending_access.clear()
+        self._access_flushed_at = time.monotonic()
+
+
+    def set(self, key, params, response_dict):
+
+        now = time.time()
+        safe_params = {k: v for k, v in params.items() if k != "api_key"}
+        with self._lock:
+            self._pending_access.pop(key, None)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, params, response, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(safe_params, sort_keys=True), json.dumps(response_dict), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+
+    def _evict(self):
+
+        # Drop least recently used entries once the cache grows past max_entries
+        if self.max_entries is None:
+            return
+        self._flush_access()
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+
+
+    def __len__(self):
+
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return count
+
+
+    def close(self):
+
+        with self._lock:
+            self._flush_access()
+            self._conn.commit()
+            self._conn.close()
+
+
+class SerpAPI():
+
+    def __init__(self, api_key, cache=None, offline=False,
+                 rate_limit=None, burst=1, max_retries=3, backoff_base=1.0, backoff_max=30.0,
+                 search_budget=None, search_client=None, transport=None):
+
+        # A GoogleSearch-style search_client is still accepted and wrapped; otherwise searches go through
+        # a pooled keep-alive SessionTransport
+        self.api_key = api_key
+        self.transport = transport or (SearchClientTransport(search_client) if search_client else SessionTransport())
+        self.cache = cache
+        self.offline = offline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.search_budget = search_budget
+        self.searches_used = 0
+
+        # One limiter and counter per instance, shared by every worker thread using it
+        self._rate_limiter = TokenBucket(rate_limit, burst) if rate_limit else None
+        self._budget_lock = threading.Lock()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+        if offline and cache is None:
+            raise ValueError("Offline mode requires a response cache")
+
+
+    def close(self):
+
+        self.transport.close()
+
+
+    @property
+    def searches_remaining(self):
+
+        if self.search_budget is None:
+            return None
+        return max(0, self.search_budget - self.searches_used)
+
+
+    def _reserve_search(self):
+
+        with self._budget_lock:
+            if self.search_budget is not None and self.searches_used >= self.search_budget:
+                raise SearchBudgetExceeded(f"Search budget of {self.search_budget} exhausted")
+            self.searches_used += 1
+
+
+    def _search_once(self, params):
+
+        import requests
+
+        self._reserve_search()
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+
+        try:
+            with metrics.stage('api_search'):
+                response_dict = self.transport.search(params)
+        except requests.exceptions.HTTPError as error:
+            # An exhausted plan is also answered with 429, and no retry will fix that
+            body = getattr(error.response, 'text', '').lower()
+            if any(marker in body for marker in QUOTA_ERROR_MARKERS):
+                raise SearchBudgetExceeded(str(error)) from error
+            metrics.increment('api_transport_errors')
+            raise RetryableSearchError(str(error)) from error
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, json.JSONDecodeError) as error:
+            metrics.increment('api_transport_errors')
+            raise RetryableSearchError(str(error)) from error
+        metrics.increment('api_searches')
+
+        error_message = str(response_dict.get("error", "")).lower()
+        if any(marker in error_message for marker in QUOTA_ERROR_MARKERS):
+            raise SearchBudgetExceeded(response_dict["error"])
+        if any(marker in error_message for marker in RETRYABLE_ERROR_MARKERS):
+            raise RetryableSearchError(response_dict["error"])
+        if error_message and not any(marker in error_message for marker in NO_RESULTS_ERROR_MARKERS):
+            metrics.increment('api_errors')
+            raise SearchError(response_dict["error"])
+
+        return response_dict
+
+
+    def search(self, params):
+
+        # Full-jitter exponential backoff between attempts on transient failures
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._search_once(params)
+            except RetryableSearchError as error:
+                if attempt == self.max_retries:
+                    raise
+                metrics.increment('api_retries')
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                logging.warning(f"Retrying search for '{params.get('q')}' in {delay:.1f}s after error: {error}")
+                time.sleep(delay)
+
+
+    def extract_organic_results(self,
+                                response_dict):
+
+        organic_results = response_dict.get("organic_results", [])
+        if not organic_results:
+            return []
+
+        # Only the fields the pipeline reads; favicons, sitelinks, rich snippets etc. are left behind
+        results_data = []
+
+        for result in organic_results:
+            result_data = {key: result.get(key, None) for key in RESULT_KEYS}
+            results_data.append(result_data)
+
+        return results_data
+
+
+    def extract_local_results(self,
+                              response_dict):
+
+        # The local pack is a list, or a dict with a "places" list, depending on the layout Google served
+        local_results = response_dict.get("local_results", [])
+        if isinstance(local_results, dict):
+            local_results = local_results.get("places", [])
+
+        results_data = []
+        for place in local_results:
+            link = place.get("website") or (place.get("links") or {}).get("website")
+            if not link:
+                continue
+            results_data.append({
+                "position": place.get("position"),
+                "title": place.get("title"),
+                "link": link,
+                "displayed_link": link,
+                "snippet": place.get("description"),
+                "snippet_highlighted_words": None,
+            })
+
+        return results_data
+
+
+    def extract_knowledge_graph(self,
+                                response_dict):
+
+        knowledge_graph = response_dict.get("knowledge_graph") or {}
+        if not knowledge_graph.get("website"):
+            return []
+
+        return [{
+            "position": 0,
+            "title": knowledge_graph.get("title"),
+            "link": knowledge_graph["website"],
+            "displayed_link": knowledge_graph["website"],
+            "snippet": knowledge_graph.get("description"),
+            "snippet_highlighted_words": None,
+        }]
+
+
+    def extract_search_results(self,
+                               response_dict,
+                               include_extra_blocks=False):
+
+        # Organic results, optionally followed by the websites in the local pack and the knowledge graph
+        results_data = self.extract_organic_results(response_dict)
+        if include_extra_blocks:
+            results_data += self.extract_local_results(response_dict) + self.extract_knowledge_graph(response_dict)
+
+        return results_data
+
+
+    def fetch_response(self, params):
+
+        # Concurrent callers asking for the same query share one pending request instead of each paying for it
+        request_key = ResponseCache.make_key(params)
+        with self._inflight_lock:
+            pending = self._inflight.get(request_key)
+            is_leader = pending is None
+            if is_leader:
+                pending = self._inflight[request_key] = Future()
+
+        if not is_leader:
+            metrics.increment('coalesced_requests')
+            return pending.result()
+
+        try:
+            response_dict = self._fetch_response_uncoalesced(params, request_key)
+            pending.set_result(response_dict)
+            return response_dict
+        except BaseException as error:
+            pending.set_exception(error)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[request_key]
+
+
+    def _fetch_response_uncoalesced(self, params, cache_key):
+
+        # Serve from cache when possible; offline mode never touches the network
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                metrics.increment('cache_hits')
+                return cached
+            metrics.increment('cache_misses')
+
+        if self.offline:
+            raise CacheMiss(f"No cached response for query '{params.get('q')}' in offline mode")
+
+        response_dict = self.search(params)
+
+        # Every other error payload was raised by search(), so this is a real answer, including Google having none
+        if self.cache is not None:
+            self.cache.set(cache_key, params, response_dict)
+
+        return response_dict
+
+
+    def build_params(self,
+                     query_restaurant,
+                     query_location=None,
+                     page=0):
+
+        # Set payload
+        params = {
+            "q": query_restaurant,
+            "hl": "en",
+            "gl": "us",
+            "google_domain": "google.com",
+            "api_key": self.api_key
+        }
+        if query_location:
+            params["location"] = query_location
+        if page:
+            params["start"] = page * RESULTS_PER_PAGE
+
+        return params
+
+
+    def get_search_records(self,
+                           query_restaurant,
+                           query_location=None,
+                           page=0,
+                           include_extra_blocks=False):
+
+        # Execute search
+        params = self.build_params(query_restaurant, query_location, page)
+        with metrics.stage('fetch_response'):
+            response_dict = self.fetch_response(params)
+
+        # Parse nested json
+        with metrics.stage('extract_organic_results'):
+            transformed_dict = self.extract_search_results(response_dict, include_extra_blocks)
+
+        return [SearchResult(query_restaurant, query_location, **result) for result in transformed_dict]
+
+
+    def get_search_results(self,
+                           query_restaurant,
+                           query_location=None):
+
+        return records_to_frame([self.get_search_records(query_restaurant, query_location)]).drop(columns=['row_id'])
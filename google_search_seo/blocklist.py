@@ -0,0 +1,79 @@
+# blocklist.py
+
+import os
+from functools import lru_cache
+
+from google_search_seo.domains import extract_host, registrable_domain
+
+
+DEFAULT_BLOCKLIST_PATH = os.path.join(os.path.dirname(__file__), 'data', 'blocklist.txt')
+
+
+class DomainBlocklist():
+    """Compiled host matcher: label keywords and domain suffixes are hash sets, so a lookup
+    costs one probe per host label regardless of how many patterns are loaded."""
+
+    def __init__(self, patterns):
+
+        self.labels = set()
+        self.domains = set()
+
+        for pattern in patterns:
+            pattern = pattern.split("#", 1)[0].strip().lower()
+            if not pattern:
+                continue
+            if "." in pattern.strip("."):
+                self.domains.add(pattern.strip("."))
+            else:
+                self.labels.add(pattern.strip("."))
+
+        self._match_host = lru_cache(maxsize=65536)(self._match_host_uncached)
+
+
+    @classmethod
+    def from_file(cls, path):
+
+        with open(path, encoding='utf-8') as handle:
+            return cls(handle.readlines())
+
+
+    def __len__(self):
+
+        return len(self.labels) + len(self.domains)
+
+
+    def _match_host_uncached(self, host):
+
+        # Keywords are checked against the registrable domain, so a subdomain such as
+        # yelp.example.com does not trip the "yelp" keyword; dotted patterns match any host suffix
+        if any(label in self.labels for label in registrable_domain(host).split(".")):
+            return True
+        host_labels = host.split(".")
+        return any(".".join(host_labels[i:]) in self.domains for i in range(len(host_labels)))
+
+
+    def matches_host(self, host):
+
+        return bool(host) and self._match_host(host)
+
+
+    def matches_link(self, link):
+
+        return self.matches_host(extract_host(link))
+
+
+    def matches_links(self, links):
+        """Vectorized lookup over a Series of links; each distinct link is parsed and matched once."""
+        import numpy as np
+        import pandas as pd
+
+        codes, unique_links = pd.factorize(links, use_na_sentinel=False)
+        unique_matches = np.array([self.matches_link(link) for link in unique_links], dtype=bool)
+        return pd.Series(unique_matches[codes], index=links.index)
+
+
+@lru_cache(maxsize=None)
+def load_blocklist(path=None):
+    """Loads and compiles a blocklist once per path; BLOCKLIST_PATH overrides the bundled default."""
+    path = path or os.getenv('BLOCKLIST_PATH') or DEFAULT_BLOCKLIST_PATH
+    return DomainBlocklist.from_file(path)
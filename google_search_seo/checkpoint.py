@@ -0,0 +1,130 @@
+# checkpoint.py
+
+import json
+import os
+import threading
+import time
+
+
+class RunJournal():
+    """Append-only JSON lines journal of completed accounts for a named batch run.
+
+    Each line holds a row's key (see helpers.journal_key) and the fractured-presence records produced for it
+    (possibly none), so a restarted run can skip finished rows and still rebuild the full output."""
+
+    def __init__(self, path):
+
+        self.path = path
+        self.completed = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(path):
+            self._load()
+
+        self._handle = open(path, 'a', encoding='utf-8')
+
+
+    @classmethod
+    def for_run(cls, run_name, runs_dir='runs', restart=False):
+
+        path = os.path.join(runs_dir, run_name, 'journal.jsonl')
+        if restart and os.path.exists(path):
+            os.remove(path)
+        return cls(path)
+
+
+    def _load(self):
+
+        with open(self.path, encoding='utf-8') as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write can leave a truncated last line; that account simply runs again
+                    continue
+                self.completed[entry['account_key']] = entry['results']
+
+
+    def is_done(self, account_key):
+
+        return account_key in self.completed
+
+
+    def record(self, entries):
+        """Durably appends a list of (account_key, result records) pairs."""
+        with self._lock:
+            for account_key, results in entries:
+                self._handle.write(json.dumps({'account_key': account_key, 'results': results}) + '\n')
+                self.completed[account_key] = results
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+
+
+    def __len__(self):
+
+        return len(self.completed)
+
+
+    def close(self):
+
+        with self._lock:
+            self._handle.close()
+
+
+class RefreshManifest():
+    """JSON lines manifest of the accounts seen by the last refresh.
+
+    Each line holds an account's identity, a fingerprint of its name, address and city, when it was last
+    searched and the fractured-presence records that search produced, so the next refresh only has to
+    search accounts that are new, edited or older than the allowed age."""
+
+    def __init__(self, path):
+
+        self.path = path
+        self.entries = {}
+
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as handle:
+                for line in handle:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry['identity']] = entry
+
+
+    def status(self, identity, fingerprint, max_age_seconds=None, now=None):
+        """Classifies an account as 'added', 'changed', 'stale' or 'unchanged' against the manifest."""
+        entry = self.entries.get(identity)
+        if entry is None:
+            return 'added'
+        if entry['fingerprint'] != fingerprint:
+            return 'changed'
+        if max_age_seconds is not None and (now or time.time()) - entry['refreshed_at'] > max_age_seconds:
+            return 'stale'
+        return 'unchanged'
+
+
+    def save(self, entries):
+        """Replaces the manifest with the given entries; accounts no longer in the export drop out."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file first so an interrupted save never corrupts the previous manifest
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            for entry in entries:
+                handle.write(json.dumps(entry) + '\n')
+        os.replace(temp_path, self.path)
+        self.entries = {entry['identity']: entry for entry in entries}
+
+
+    def __len__(self):
+
+        return len(self.entries)
@@ -0,0 +1,458 @@
+# cli.py
+#
+# Single entry point for the pipeline, installed as the `google-search-seo` command:
+#
+#   google-search-seo single --name "Niki's Pizza & Pasta" --address "508 North Bell Boulevard" --city "Cedar Park"
+#   google-search-seo single < accounts.jsonl
+#   google-search-seo batch --sample-n 500 --run-name nightly
+#   google-search-seo batch --sample-n 200000 --shard-index 3 --shard-count 8 --shard-dir shards/
+#   google-search-seo merge --shard-dir shards/ --output fractured.jsonl
+#   google-search-seo refresh --max-age-days 30 --output fractured.jsonl
+#   google-search-seo rescore --run nightly
+#   google-search-seo index --domain-index domains.json --domain nikispizza.com --top 20
+#   google-search-seo serve --port 8080
+#
+# Heavy libraries are imported inside the command that needs them: `single` never loads pandas, and a
+# cached single-record lookup never loads serpapi or requests either.
+
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import sys
+
+from google_search_seo.similarity import DEFAULT_THRESHOLD, SIMILARITY_BACKENDS
+
+
+OUTPUT_SLICE_ROWS = 10000
+SHARD_FILE_PATTERN = re.compile(r'shard-(\d+)-of-(\d+)\.jsonl$')
+
+
+def env_flag(name):
+
+    return os.getenv(name, 'false').lower() in ('1', 'true', 'yes')
+
+
+def build_scraper_api(max_workers=1):
+
+    from google_search_seo.api_manager import SerpAPI, ResponseCache
+    from google_search_seo.transport import SERPAPI_URL, SessionTransport
+
+    # Get environment vars
+    CACHE_PATH = os.getenv('CACHE_PATH', '.cache/serp_responses.sqlite')
+    CACHE_TTL_HOURS = os.getenv('CACHE_TTL_HOURS')
+    CACHE_MAX_ENTRIES = os.getenv('CACHE_MAX_ENTRIES')
+    RATE_LIMIT = os.getenv('SERPAPI_RATE_LIMIT')
+    SEARCH_BUDGET = os.getenv('SERPAPI_SEARCH_BUDGET')
+    BASE_URL = os.getenv('SERPAPI_BASE_URL', SERPAPI_URL)
+    POOL_SIZE = int(os.getenv('SERPAPI_POOL_SIZE', max_workers))
+    CONNECT_TIMEOUT = float(os.getenv('SERPAPI_CONNECT_TIMEOUT', 5))
+    READ_TIMEOUT = float(os.getenv('SERPAPI_READ_TIMEOUT', 60))
+
+    # Initialize response cache and api manager
+    cache = ResponseCache(
+        CACHE_PATH,
+        ttl_seconds=float(CACHE_TTL_HOURS) * 3600 if CACHE_TTL_HOURS else None,
+        max_entries=int(CACHE_MAX_ENTRIES) if CACHE_MAX_ENTRIES else None
+    )
+    return SerpAPI(
+        os.getenv('SERPAPI_KEY'),
+        cache=cache,
+        offline=env_flag('OFFLINE'),
+        rate_limit=float(RATE_LIMIT) if RATE_LIMIT else None,
+        burst=max_workers,
+        search_budget=int(SEARCH_BUDGET) if SEARCH_BUDGET else None,
+        transport=SessionTransport(BASE_URL, POOL_SIZE, CONNECT_TIMEOUT, READ_TIMEOUT)
+    )
+
+
+def add_scoring_args(parser):
+
+    parser.add_argument('--blocklist', help="Blocklist file to filter with (defaults to BLOCKLIST_PATH or the bundled list)")
+    parser.add_argument('--similarity-threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Minimum pairwise domain similarity for a fractured presence")
+    parser.add_argument('--similarity-backend', choices=sorted(SIMILARITY_BACKENDS), default='difflib')
+    parser.add_argument('--no-location-filter', action='store_true', help="Skip the location-domain filter")
+
+
+def scoring_options(args):
+
+    return {
+        'blocklist_path': args.blocklist,
+        'similarity_threshold': args.similarity_threshold,
+        'similarity_backend': args.similarity_backend,
+        'location_filter': not args.no_location_filter,
+    }
+
+
+def build_parser():
+
+    parser = argparse.ArgumentParser(prog='google-search-seo', description="Find restaurants with a fractured online presence.")
+    parser.add_argument('--log-level', default='INFO', help="Logging level (logs go to stderr)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    single = commands.add_parser('single', help="Score single accounts given as arguments or JSON lines on stdin")
+    single.add_argument('--name', help="Account name")
+    single.add_argument('--address', help="Billing address line 1")
+    single.add_argument('--city', help="Billing city")
+    add_scoring_args(single)
+
+    batch = commands.add_parser('batch', help="Score a sample of the accounts in CSV_PATH")
+    batch.add_argument('--sample-n', type=int, required=True, help="Number of restaurants to run")
+    batch.add_argument('--run-name', help="Name of the run; progress is journaled under runs/<name>/ so it can be resumed")
+    progress = batch.add_mutually_exclusive_group()
+    progress.add_argument('--resume', action='store_true', help="Skip accounts already completed by the named run (default)")
+    progress.add_argument('--restart', action='store_true', help="Discard the named run's progress and start over")
+    batch.add_argument('--domain-index', help="JSON file of the domain -> accounts index to update with this run")
+    batch.add_argument('--store-raw', action='store_true',
+                       help="Save raw search results under RAW_RESULTS_DIR/run=<run name> for offline re-scoring")
+    batch.add_argument('--processes', type=int, help="Score result chunks on this many worker processes")
+    batch.add_argument('--adaptive-pages', type=int, metavar='N',
+                       help="Also read the local pack and knowledge graph, and fetch up to N result pages "
+                            "while an account's verdict is still undecided")
+    batch.add_argument('--metrics-out', help="Write per-stage timings and counters here (.prom for Prometheus text, else JSON)")
+    batch.add_argument('--output', help="Stream results to this file as they are scored (.parquet for Parquet, "
+                                        "else JSON lines); defaults to OUTPUT_PATH, otherwise they are printed at the end")
+    batch.add_argument('--shard-index', type=int, help="Process only this shard of the sample (0-based)")
+    batch.add_argument('--shard-count', type=int, help="Number of shards the sample is split into")
+    batch.add_argument('--shard-dir', default='shards', help="Where a shard writes its output and run statistics")
+
+    refresh = commands.add_parser('refresh', help="Re-search only accounts in CSV_PATH that are new, edited or stale")
+    refresh.add_argument('--manifest', default=os.path.join('runs', 'refresh', 'manifest.jsonl'),
+                         help="Manifest of the previous refresh, replaced with this one's")
+    refresh.add_argument('--max-age-days', type=float, default=30, help="Re-search accounts last searched longer ago than this")
+    refresh.add_argument('--id-column', help="Stable account id column, so edited accounts are recognized as edits")
+    refresh.add_argument('--domain-index', help="JSON file of the domain -> accounts index to update with this refresh")
+    refresh.add_argument('--processes', type=int, help="Score result chunks on this many worker processes")
+    refresh.add_argument('--adaptive-pages', type=int, metavar='N',
+                         help="Also read the local pack and knowledge graph, and fetch up to N result pages "
+                              "while an account's verdict is still undecided")
+    refresh.add_argument('--metrics-out', help="Write per-stage timings and counters here (.prom for Prometheus text, else JSON)")
+    refresh.add_argument('--output', help="Write results here instead of printing them (.parquet for Parquet, else JSON lines)")
+
+    merge = commands.add_parser('merge', help="Combine the outputs of a sharded batch into one single-node result")
+    merge.add_argument('--shard-dir', default='shards', help="Directory the shards wrote to")
+    merge.add_argument('--output', help="Write results here instead of printing them (.parquet for Parquet, else JSON lines)")
+    merge.add_argument('--stats-out', help="Write the combined run statistics to this JSON file")
+
+    rescore = commands.add_parser('rescore', help="Re-run filtering and aggregation over stored raw results, without API calls")
+    rescore.add_argument('--run', required=True, help="Name of the stored run to re-score")
+    add_scoring_args(rescore)
+    rescore.add_argument('--processes', type=int, help="Score stored chunks on this many worker processes")
+    rescore.add_argument('--domain-index', help="Write the domain -> accounts index for this scoring to this JSON file")
+    rescore.add_argument('--output', help="Write results here instead of printing them (.parquet for Parquet, else JSON lines)")
+
+    index = commands.add_parser('index', help="Look up a domain -> accounts index saved by batch, refresh or rescore")
+    index.add_argument('--domain-index', required=True, help="JSON file of the domain -> accounts index")
+    index.add_argument('--domain', action='append', default=[],
+                       help="Print the accounts whose results contain this domain (a link or subdomain also works); repeatable")
+    index.add_argument('--top', type=int, metavar='N', help="Print the N domains shared by the most accounts")
+
+    serve = commands.add_parser('serve', help="Serve single-account checks over HTTP with warm caches (see google_search_seo/service.py)")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--unix-socket', help="Listen on this Unix socket instead of TCP")
+    serve.add_argument('--workers', type=int, default=8, help="Concurrent searches across all requests")
+    add_scoring_args(serve)
+
+    return parser
+
+
+def iter_single_inputs(args):
+
+    # One account from the arguments, otherwise one JSON object per stdin line with the CSV's column names
+    if args.name is not None:
+        yield args.name, args.address or '', args.city or ''
+        return
+
+    for line in sys.stdin:
+        if line.strip():
+            account = json.loads(line)
+            yield account['account_name'], account.get('billing_address_line_1', ''), account.get('billing_city', '')
+
+
+def run_single(args):
+
+    from google_search_seo.single_record import score_record
+
+    scraper_api = build_scraper_api()
+    options = scoring_options(args)
+    for account_name, billing_address, billing_city in iter_single_inputs(args):
+
+        # Create search query, combining restaurant name and address
+        full_query = f"{account_name} {billing_address}"
+        records = scraper_api.get_search_records(query_restaurant=full_query, query_location=billing_city)
+        print(json.dumps(score_record(full_query, billing_city, records, **options)), flush=True)
+
+
+def run_batch(args):
+
+    from google_search_seo.checkpoint import RunJournal
+    from google_search_seo.domain_index import DomainIndex
+    from google_search_seo.instrumentation import metrics
+    from google_search_seo.raw_store import RawResultStore
+    from google_search_seo.helpers import batch_process, stream_batch_process
+
+    # Shards always keep statistics, so merge can report on the whole run
+    shard = (args.shard_index, args.shard_count) if args.shard_count else None
+    metrics.enabled = bool(args.metrics_out) or shard is not None
+
+    # Get environment vars
+    CSV_PATH = os.getenv('CSV_PATH')
+    MAX_WORKERS = int(os.getenv('MAX_WORKERS', 8))
+    OUTPUT_PATH = args.output or os.getenv('OUTPUT_PATH')
+    RAW_RESULTS_DIR = os.getenv('RAW_RESULTS_DIR', 'raw_results')
+
+    scraper_api = build_scraper_api(MAX_WORKERS)
+
+    # Journal progress for named runs so an interrupted batch can pick up where it stopped
+    journal = RunJournal.for_run(args.run_name, restart=args.restart) if args.run_name else None
+
+    # Keep every raw response of a named run so filter changes can be re-scored without new searches
+    raw_writer = RawResultStore(RAW_RESULTS_DIR).writer(args.run_name, overwrite=args.restart) if args.store_raw else None
+
+    # Accumulate the cross-account domain index on top of whatever earlier runs saved
+    domain_index = DomainIndex(args.domain_index) if args.domain_index else None
+
+    # A shard writes its slice to the shard directory instead of OUTPUT_PATH or stdout
+    shard_path = shard_output_path(args.shard_dir, *shard) if shard is not None else None
+    output_path = shard_path if shard_path and OUTPUT_PATH else OUTPUT_PATH
+
+    try:
+        # Stream results to a JSON lines file when an output path is set, otherwise print them at the end
+        if output_path:
+            stream_batch_process(CSV_PATH, scraper_api, args.sample_n, output_path, max_workers=MAX_WORKERS, journal=journal,
+                                 domain_index=domain_index, processes=args.processes, raw_writer=raw_writer,
+                                 adaptive_pages=args.adaptive_pages, shard=shard)
+        else:
+            data = batch_process(CSV_PATH, scraper_api, args.sample_n, max_workers=MAX_WORKERS, journal=journal,
+                                 domain_index=domain_index, processes=args.processes, raw_writer=raw_writer,
+                                 adaptive_pages=args.adaptive_pages, shard=shard)
+            write_output(data, shard_path)
+        logging.info(f"Spent {scraper_api.searches_used} searches this run")
+        if shard is not None:
+            write_shard_stats(shard_path, {
+                'shard_index': args.shard_index,
+                'shard_count': args.shard_count,
+                'sample_n': args.sample_n,
+                'csv_path': CSV_PATH,
+                'streaming': bool(OUTPUT_PATH),
+                'searches_used': scraper_api.searches_used,
+                'metrics': metrics.to_dict(),
+            })
+    finally:
+        if args.metrics_out:
+            metrics.write(args.metrics_out)
+        if domain_index is not None:
+            domain_index.save()
+            logging.info(f"Most frequent domains: {domain_index.top_domains(10)}")
+
+
+def run_refresh(args):
+
+    from google_search_seo.checkpoint import RefreshManifest
+    from google_search_seo.domain_index import DomainIndex
+    from google_search_seo.instrumentation import metrics
+    from google_search_seo.helpers import refresh_process
+
+    metrics.enabled = bool(args.metrics_out)
+
+    # Get environment vars
+    CSV_PATH = os.getenv('CSV_PATH')
+    MAX_WORKERS = int(os.getenv('MAX_WORKERS', 8))
+
+    scraper_api = build_scraper_api(MAX_WORKERS)
+    domain_index = DomainIndex(args.domain_index) if args.domain_index else None
+
+    try:
+        data = refresh_process(CSV_PATH, scraper_api, RefreshManifest(args.manifest), args.max_age_days * 86400,
+                               id_column=args.id_column, max_workers=MAX_WORKERS, domain_index=domain_index,
+                               processes=args.processes, adaptive_pages=args.adaptive_pages)
+        logging.info(f"Spent {scraper_api.searches_used} searches this refresh")
+        write_output(data, args.output)
+    finally:
+        if args.metrics_out:
+            metrics.write(args.metrics_out)
+        if domain_index is not None:
+            domain_index.save()
+
+
+def write_output(data, path=None):
+
+    from google_search_seo.output import open_output_writer
+
+    # Handed over in slices, so printing a large result never builds it as one string
+    with open_output_writer(path) as output:
+        for start in range(0, len(data), OUTPUT_SLICE_ROWS):
+            output.write(data.iloc[start:start + OUTPUT_SLICE_ROWS])
+
+
+def shard_output_path(shard_dir, shard_index, shard_count):
+
+    os.makedirs(shard_dir, exist_ok=True)
+    return os.path.join(shard_dir, f"shard-{shard_index:05d}-of-{shard_count:05d}.jsonl")
+
+
+def write_shard_stats(shard_path, stats):
+
+    with open(f"{shard_path}.stats.json", 'w', encoding='utf-8') as handle:
+        json.dump(stats, handle, indent=2)
+
+
+def find_shard_outputs(shard_dir):
+    """Returns the shard output paths in index order, refusing a set that is incomplete or mixes runs."""
+    shards = {}
+    for path in glob.glob(os.path.join(shard_dir, 'shard-*-of-*.jsonl')):
+        shard_index, shard_count = map(int, SHARD_FILE_PATTERN.search(path).groups())
+        shards[(shard_index, shard_count)] = path
+
+    shard_counts = {shard_count for _, shard_count in shards}
+    if len(shard_counts) != 1:
+        raise SystemExit(f"Expected the outputs of one sharded run in {shard_dir}, found shard counts {sorted(shard_counts)}")
+    shard_count = shard_counts.pop()
+    missing = [shard_index for shard_index in range(shard_count) if (shard_index, shard_count) not in shards]
+    if missing:
+        raise SystemExit(f"Shards {missing} of {shard_count} have no output in {shard_dir}")
+
+    return [shards[(shard_index, shard_count)] for shard_index in range(shard_count)]
+
+
+def merge_shard_stats(shard_paths):
+
+    from google_search_seo.instrumentation import merge_summaries
+
+    stats = []
+    for path in shard_paths:
+        with open(f"{path}.stats.json", encoding='utf-8') as handle:
+            stats.append(json.load(handle))
+
+    # Shards of one run sampled the same CSV the same way; anything else would not merge into a single run
+    for key in ('sample_n', 'csv_path', 'streaming'):
+        if len({json.dumps(shard_stats[key]) for shard_stats in stats}) > 1:
+            raise SystemExit(f"Shards disagree on {key}; they are not from the same run")
+
+    return {
+        'shard_count': len(stats),
+        'sample_n': stats[0]['sample_n'],
+        'csv_path': stats[0]['csv_path'],
+        'streaming': stats[0]['streaming'],
+        'searches_used': sum(shard_stats['searches_used'] for shard_stats in stats),
+        'metrics': merge_summaries(shard_stats['metrics'] for shard_stats in stats),
+    }
+
+
+def run_merge(args):
+
+    from google_search_seo.helpers import merge_shard_outputs
+
+    shard_paths = find_shard_outputs(args.shard_dir)
+    stats = merge_shard_stats(shard_paths)
+    data = merge_shard_outputs(shard_paths)
+    stats['results'] = len(data)
+    logging.info(f"Merged {len(shard_paths)} shards: {len(data)} fractured presence results, "
+                 f"{stats['searches_used']} searches")
+
+    if args.stats_out:
+        with open(args.stats_out, 'w', encoding='utf-8') as handle:
+            json.dump(stats, handle, indent=2)
+
+    # Same sink as a single-node run, so the merged output is byte-for-byte what one node would write
+    write_output(data, args.output)
+
+
+def run_rescore(args):
+
+    from google_search_seo.domain_index import DomainIndex
+    from google_search_seo.raw_store import RawResultStore
+    from google_search_seo.helpers import rescore_raw_results
+
+    RAW_RESULTS_DIR = os.getenv('RAW_RESULTS_DIR', 'raw_results')
+
+    raw_store = RawResultStore(RAW_RESULTS_DIR)
+    if args.run not in raw_store.runs():
+        raise SystemExit(f"No stored raw results for run '{args.run}' in {RAW_RESULTS_DIR}")
+
+    domain_index = DomainIndex() if args.domain_index else None
+
+    data = rescore_raw_results(raw_store, args.run, processes=args.processes, domain_index=domain_index,
+                               **scoring_options(args))
+    logging.info(f"Found {len(data)} fractured presence results")
+
+    if domain_index is not None:
+        domain_index.save(args.domain_index)
+
+    write_output(data, args.output)
+
+
+def run_index(args):
+
+    from google_search_seo.domain_index import DomainIndex
+    from google_search_seo.domains import registrable_domain_of_link
+
+    if not os.path.exists(args.domain_index):
+        raise SystemExit(f"No domain index at {args.domain_index}")
+    domain_index = DomainIndex(args.domain_index)
+
+    # The index is keyed by registrable domain, so a pasted link or subdomain is reduced the same way
+    for domain in args.domain:
+        registrable = registrable_domain_of_link(domain)
+        print(json.dumps({'domain': registrable, 'accounts': domain_index.accounts_for(registrable)}), flush=True)
+    if args.top:
+        for domain, account_count in domain_index.top_domains(args.top):
+            print(json.dumps({'domain': domain, 'account_count': account_count}), flush=True)
+
+
+def run_serve(args):
+
+    from google_search_seo.instrumentation import metrics
+    from google_search_seo.service import ScoringService, make_server
+
+    metrics.enabled = True
+    service = ScoringService(build_scraper_api(args.workers), max_workers=args.workers, **scoring_options(args))
+    server = make_server(service, args.host, args.port, args.unix_socket)
+    logging.info(f"Serving on {args.unix_socket or f'http://{args.host}:{args.port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        service.scraper_api.close()
+
+
+COMMANDS = {
+    'single': run_single,
+    'batch': run_batch,
+    'refresh': run_refresh,
+    'merge': run_merge,
+    'rescore': run_rescore,
+    'index': run_index,
+    'serve': run_serve,
+}
+
+
+def main(argv=None):
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'batch' and (args.resume or args.restart or args.store_raw) and not args.run_name:
+        parser.error("--resume, --restart and --store-raw require --run-name")
+    if args.command == 'batch' and (args.shard_index is None) != (args.shard_count is None):
+        parser.error("--shard-index and --shard-count go together")
+    if args.command == 'batch' and args.shard_count and not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be between 0 and --shard-count - 1")
+    if args.command == 'index' and not (args.domain or args.top):
+        parser.error("index needs --domain or --top")
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s - %(levelname)s - %(message)s')
+    COMMANDS[args.command](args)
+
+
+if __name__ == '__main__':
+    main()
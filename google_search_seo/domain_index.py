@@ -0,0 +1,69 @@
+# domain_index.py
+
+import heapq
+import json
+import os
+import threading
+from collections import defaultdict
+
+
+class DomainIndex():
+    """Inverted index from stripped domain to the accounts whose filtered search results contain it.
+
+    Built incrementally while batches run and persisted as JSON, so portfolio-wide questions
+    (which accounts share a domain, which domains recur most) don't need a pass over the output."""
+
+    def __init__(self, path=None):
+
+        self.path = path
+        self.accounts_by_domain = defaultdict(set)
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as handle:
+                for domain, accounts in json.load(handle).items():
+                    self.accounts_by_domain[domain].update(accounts)
+
+
+    def add(self, account_key, domains):
+
+        with self._lock:
+            for domain in domains:
+                self.accounts_by_domain[domain].add(account_key)
+
+
+    def add_pairs(self, account_keys, domains):
+        """Adds parallel sequences of account keys and domains, e.g. two columns of a results frame."""
+        with self._lock:
+            for account_key, domain in zip(account_keys, domains):
+                self.accounts_by_domain[domain].add(account_key)
+
+
+    def accounts_for(self, domain):
+
+        with self._lock:
+            return sorted(self.accounts_by_domain.get(domain, ()))
+
+
+    def top_domains(self, n=10):
+
+        with self._lock:
+            return heapq.nlargest(n, ((domain, len(accounts)) for domain, accounts in self.accounts_by_domain.items()),
+                                  key=lambda item: (item[1], item[0]))
+
+
+    def __len__(self):
+
+        return len(self.accounts_by_domain)
+
+
+    def save(self, path=None):
+
+        # Write to a temporary file first so an interrupted save never corrupts the existing index
+        path = path or self.path
+        with self._lock:
+            payload = {domain: sorted(accounts) for domain, accounts in self.accounts_by_domain.items()}
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as handle:
+            json.dump(payload, handle)
+        os.replace(temp_path, path)
@@ -0,0 +1,121 @@
+# domains.py
+
+import ipaddress
+import os
+from functools import lru_cache
+
+
+PUBLIC_SUFFIX_LIST_PATH = os.path.join(os.path.dirname(__file__), 'data', 'public_suffix_list.dat')
+
+RULE_END = '$'
+EXCEPTIONS = '!'
+WILDCARD = '*'
+
+
+def extract_host(link):
+    """Returns the lowercased host of a link, tolerating links without a scheme."""
+    if not isinstance(link, str):
+        return ''
+    authority = link.split("//", 1)[-1]
+    for separator in ("/", "?", "#"):
+        authority = authority.split(separator, 1)[0]
+    host = authority.rsplit("@", 1)[-1].split(":", 1)[0]
+    return host.strip(".").lower()
+
+
+class PublicSuffixTrie():
+    """Public suffix rules as a trie of nested dicts keyed by reversed labels, so finding the longest
+    matching rule costs one dict lookup per host label."""
+
+    def __init__(self, rules):
+
+        self.root = {}
+        for rule in rules:
+            rule = rule.strip().lower()
+            if not rule or rule.startswith('//'):
+                continue
+
+            is_exception = rule.startswith('!')
+            labels = rule.lstrip('!').split('.')
+
+            # An exception "!city.kawasaki.jp" is stored on the kawasaki.jp node as an exempt label
+            node = self.root
+            for label in reversed(labels[1:] if is_exception else labels):
+                node = node.setdefault(label, {})
+            if is_exception:
+                node.setdefault(EXCEPTIONS, set()).add(labels[0])
+            else:
+                node[RULE_END] = True
+
+
+    @classmethod
+    def from_file(cls, path):
+
+        with open(path, encoding='utf-8') as handle:
+            return cls(handle)
+
+
+    def suffix_length(self, labels):
+        """Number of trailing labels that form the public suffix; unlisted TLDs fall back to one label."""
+        node = self.root
+        matched = 1
+        depth = 0
+
+        for label in reversed(labels):
+            if label in node.get(EXCEPTIONS, ()):
+                return depth
+            next_node = node.get(label, node.get(WILDCARD))
+            if next_node is None:
+                break
+            depth += 1
+            if next_node.get(RULE_END):
+                matched = depth
+            node = next_node
+
+        return matched
+
+
+@lru_cache(maxsize=None)
+def load_public_suffixes(path=PUBLIC_SUFFIX_LIST_PATH):
+
+    return PublicSuffixTrie.from_file(path)
+
+
+def is_ip_address(host):
+
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+@lru_cache(maxsize=131072)
+def registrable_domain(host):
+    """The public suffix plus one label, e.g. order.niki.com -> niki.com and foo.bar.co.uk -> bar.co.uk."""
+    host = host.strip('.').lower()
+    if not host or is_ip_address(host):
+        return host
+
+    labels = host.split('.')
+    suffix_length = load_public_suffixes().suffix_length(labels)
+    if len(labels) <= suffix_length:
+        return host
+    return '.'.join(labels[-(suffix_length + 1):])
+
+
+def registrable_domain_of_link(link):
+
+    if not isinstance(link, str):
+        return None
+    return registrable_domain(extract_host(link))
+
+
+def registrable_domains(links):
+    """Vectorized over a Series of links; each distinct link is parsed once and hosts are memoized."""
+    import numpy as np
+    import pandas as pd
+
+    codes, unique_links = pd.factorize(links, use_na_sentinel=False)
+    unique_domains = np.array([registrable_domain_of_link(link) for link in unique_links], dtype=object)
+    return pd.Series(unique_domains[codes], index=links.index, dtype=object)
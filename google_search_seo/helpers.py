@@ -0,0 +1,705 @@
+# helpers.py
+
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter, deque
+from functools import partial
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from google_search_seo.api_manager import (
+    CacheMiss,
+    RetryableSearchError,
+    SearchBudgetExceeded,
+    SearchError,
+    records_to_frame
+)
+from google_search_seo.blocklist import load_blocklist
+from google_search_seo.domains import registrable_domains
+from google_search_seo.instrumentation import metrics
+from google_search_seo.location import is_location_domain
+from google_search_seo.output import open_output_writer
+from google_search_seo.similarity import DEFAULT_THRESHOLD, has_similar_pair
+
+
+INPUT_COLUMNS = ['account_name', 'billing_address_line_1', 'billing_city']
+
+# Failures that only concern the account at hand (an uncached query in offline mode, a search still failing
+# after its retries, an error payload such as an invalid key): the account is logged and left out of the output
+# and the journal, so a resumed run or the next refresh tries it again, while the searches already paid for in
+# the batch are kept
+ACCOUNT_ERRORS = (CacheMiss, RetryableSearchError, SearchError)
+
+
+def remove_blacklisted_domains(results_data, link_column='link', blocklist=None):
+
+    blocklist = blocklist if blocklist is not None else load_blocklist()
+    is_blacklisted = blocklist.matches_links(results_data[link_column])
+    filtered_df = results_data[~is_blacklisted]
+    
+    return filtered_df
+
+
+def strip_domains(links):
+
+    # Registrable domain (public suffix + one label) of each link, e.g. https://order.niki.com/menu -> niki.com
+    return registrable_domains(links)
+
+
+def remove_correlated_domains(results_data, link_column):
+
+    results_data_copy = results_data.copy()
+    results_data_copy['stripped_domain'] = strip_domains(results_data_copy[link_column])
+    
+    return results_data_copy
+
+
+def remove_location_domains(results_data):
+
+    if results_data.empty:
+        return results_data
+
+    # Evaluate each distinct (restaurant, city, domain) triple once and broadcast the verdict to its rows
+    keys = pd.MultiIndex.from_arrays([
+        results_data['input_restaurant'], results_data['input_city'], results_data['stripped_domain']
+    ])
+    codes, unique_keys = keys.factorize()
+    is_location = np.array([is_location_domain(*key) for key in unique_keys], dtype=bool)
+
+    return results_data[~is_location[codes]]
+
+
+def filter_search_results(results_data, link_column='link', blocklist=None, location_filter=True):
+
+    with metrics.stage('remove_blacklisted_domains', rows_in=len(results_data)) as stage:
+        df_reduced = remove_blacklisted_domains(results_data, link_column, blocklist)
+        stage.rows_out = len(df_reduced)
+    with metrics.stage('remove_correlated_domains', rows_in=len(df_reduced)) as stage:
+        df_stripped = remove_correlated_domains(df_reduced, link_column)
+        stage.rows_out = len(df_stripped)
+    with metrics.stage('remove_location_domains', rows_in=len(df_stripped)) as stage:
+        df_subset = remove_location_domains(df_stripped) if location_filter else df_stripped
+        stage.rows_out = len(df_subset)
+    logging.info(f"Kept {len(df_subset)} of {len(results_data)} search results after filtering")
+    
+    return df_subset
+
+
+def group_unique_domains(df_subset, group_columns=('input_restaurant', 'input_city')):
+
+    # First-appearance order rather than set order, so the lists are identical across processes and runs
+    df_aggregated = df_subset.groupby(list(group_columns))['stripped_domain'].agg(lambda x: list(dict.fromkeys(x))).reset_index()
+    df_aggregated.rename(columns={'stripped_domain': 'unique_domain_list'}, inplace=True)
+    
+    return df_aggregated
+
+
+def aggregate_fractured_domains(df_subset, group_columns=('input_restaurant', 'input_city'),
+                                similarity_threshold=DEFAULT_THRESHOLD, similarity_backend='difflib'):
+
+    with metrics.stage('groupby_aggregation', rows_in=len(df_subset)) as stage:
+        df_aggregated = group_unique_domains(df_subset, group_columns)
+        stage.rows_out = len(df_aggregated)
+    
+    if df_aggregated.empty:
+        return df_aggregated
+    
+    df_aggregated['unique_domain_count'] = df_aggregated['unique_domain_list'].apply(len)
+    df_fractured = df_aggregated[df_aggregated['unique_domain_count'] > 1]
+    with metrics.stage('remove_low_similarity_domains', rows_in=len(df_fractured)) as stage:
+        df_fractured_with_similarity = remove_low_similarity_domains(df_fractured, similarity_threshold, similarity_backend)
+        stage.rows_out = len(df_fractured_with_similarity)
+    
+    return df_fractured_with_similarity
+
+
+def remove_low_similarity_domains(results_data, threshold=DEFAULT_THRESHOLD, backend='difflib'):
+
+    # Keep rows where at least one pair of domains scores above the threshold; scoring stops at the first such pair
+    if not results_data.empty:
+        
+        is_similar = results_data['unique_domain_list'].apply(lambda domains: has_similar_pair(domains, threshold, backend))
+        
+        results_data = results_data[is_similar.astype(bool)]
+    
+    return results_data
+
+
+def standardize_column_name(column):
+    new_column = column.lower()
+    new_column = re.sub(r'\W+', '_', new_column)
+    new_column = new_column.strip('_')
+    return new_column
+
+
+def standardize_columns(input_data):
+    new_columns = input_data.columns
+    new_columns = new_columns.str.lower()
+    new_columns = new_columns.str.replace(r'\W+', '_', regex=True)
+    new_columns = new_columns.str.strip('_')
+    input_data.columns = new_columns
+    return input_data
+
+
+def reservoir_sample(filepath, sample_n, chunksize=10000, random_state=42):
+
+    # Single pass over the CSV holding at most sample_n rows (Algorithm R), reading only the query columns
+    rng = random.Random(random_state)
+    reservoir = []
+    seen = 0
+
+    chunks = pd.read_csv(filepath, chunksize=chunksize,
+                         usecols=lambda column: standardize_column_name(column) in INPUT_COLUMNS)
+    for chunk in chunks:
+        chunk = standardize_columns(chunk)
+        for record in chunk.to_dict('records'):
+            if seen < sample_n:
+                reservoir.append(record)
+            else:
+                slot = rng.randrange(seen + 1)
+                if slot < sample_n:
+                    reservoir[slot] = record
+            seen += 1
+
+    logging.info(f"Sampled {len(reservoir)} of {seen} accounts from {filepath}")
+    return reservoir
+
+
+def ordered_map(func, items, max_workers=1, idle_marker=None, window=None):
+
+    # Like Executor.map, but never holds more than window (default max_workers * 2) requests in flight or
+    # waiting to be consumed. With an idle_marker, it is yielded before waiting on a result that is not
+    # ready yet, so the consumer can act on what it already holds instead of sitting on it.
+    max_workers = max(1, int(max_workers))
+    window = max(window or 0, max_workers * 2)
+
+    def result_of(future):
+        if idle_marker is not None and not future.done():
+            yield idle_marker
+        yield future.result()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        for item in items:
+            in_flight.append(executor.submit(func, item))
+            if len(in_flight) >= window:
+                yield from result_of(in_flight.popleft())
+        while in_flight:
+            yield from result_of(in_flight.popleft())
+
+
+def fetch_row(row, scraper_api, adaptive_pages=None):
+
+    logging.info(f"Processing row for {row['account_name']} at {row['billing_address_line_1']}")
+    full_query = f"{row['account_name']} {row['billing_address_line_1']}"
+    if not adaptive_pages:
+        return scraper_api.get_search_records(query_restaurant=full_query, query_location=row['billing_city'])
+    return fetch_row_adaptive(full_query, row['billing_city'], scraper_api, adaptive_pages)
+
+
+def fetch_row_or_skip(row, scraper_api, adaptive_pages=None):
+
+    try:
+        return fetch_row(row, scraper_api, adaptive_pages)
+    except ACCOUNT_ERRORS as error:
+        metrics.increment('skipped_accounts')
+        logging.warning(f"Skipping {row['account_name']} at {row['billing_address_line_1']}: {error}")
+        return None
+
+
+def fetch_row_adaptive(full_query, city, scraper_api, max_pages):
+
+    # The first page is read in full (organic, local pack, knowledge graph); later pages are only paid for
+    # while the verdict is undecided, i.e. exactly one domain survives filtering, and only while Google has more
+    records = scraper_api.get_search_records(full_query, city, include_extra_blocks=True)
+    for page in range(1, max_pages):
+        if len(surviving_domains(records)) != 1:
+            break
+        page_records = scraper_api.get_search_records(full_query, city, page=page)
+        if not page_records:
+            break
+        metrics.increment('adaptive_extra_pages')
+        records = records + page_records
+
+    return records
+
+
+def surviving_domains(records):
+
+    # Same filters as scoring, without per-stage metrics, to decide whether another page is worth fetching
+    if not records:
+        return set()
+    df_reduced = remove_blacklisted_domains(records_to_frame([records]), 'link')
+    df_subset = remove_location_domains(remove_correlated_domains(df_reduced, 'link'))
+    return set(df_subset['stripped_domain'].dropna())
+
+
+def process_row(row, scraper_api):
+
+    df_fractured_with_similarity = score_batch([fetch_row(row, scraper_api)]).drop(columns=['row_id'])
+    
+    if not df_fractured_with_similarity.empty:
+        logging.info(f"Found {len(df_fractured_with_similarity)} fractured domains with high similarity scores")
+        return df_fractured_with_similarity
+    else:
+        logging.info("No fractured domains found or similarity scores below threshold")
+        return pd.DataFrame()
+
+
+def account_key(row):
+
+    # Case- and whitespace-insensitive identity of an account, stable across re-imports of the CSV
+    parts = (row['account_name'], row['billing_address_line_1'], row['billing_city'])
+    return '|'.join(' '.join(str(part).lower().split()) for part in parts)
+
+
+def shard_of(key, shard_count):
+
+    # A content hash rather than hash(), which is salted per process, so every node agrees on the split
+    return int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'big') % shard_count
+
+
+def number_rows(rows):
+
+    # Each sampled row carries its position in the full sample: shard outputs are merged back into
+    # single-node order by it, and the journal tells duplicate rows apart by it
+    return [{**row, 'sample_position': position} for position, row in enumerate(rows)]
+
+
+def select_shard(rows, shard):
+    """Keeps the numbered sample rows that belong to shard (index, count)."""
+    shard_index, shard_count = shard
+    selected = [row for row in rows if shard_of(account_key(row), shard_count) == shard_index]
+
+    logging.info(f"Shard {shard_index} of {shard_count} holds {len(selected)} of {len(rows)} sampled accounts")
+    return selected
+
+
+def output_frame(df_scored, chunk_rows, shard):
+
+    # Shard outputs carry each account's sample position for merge_shard_outputs
+    df_output = df_scored.drop(columns=['row_id'])
+    if shard is not None:
+        df_output['sample_position'] = [chunk_rows[row_id]['sample_position'] for row_id in df_scored['row_id']]
+    return df_output
+
+
+def merge_shard_outputs(shard_paths):
+    """Combines per-shard JSON lines outputs into the output a single-node run over the same sample gives."""
+    records = []
+    for path in shard_paths:
+        with open(path, encoding='utf-8') as handle:
+            records.extend(json.loads(line) for line in handle if line.strip())
+
+    # Python's sort is stable, so an account's records keep their order within its position
+    records.sort(key=lambda record: record['sample_position'])
+    for record in records:
+        del record['sample_position']
+    return pd.DataFrame(records)
+
+
+def score_frame(df_combined, blocklist_path=None, similarity_threshold=DEFAULT_THRESHOLD,
+                similarity_backend='difflib', location_filter=True):
+
+    # Pure CPU work with picklable inputs and outputs, so it can run in a worker process. Returns the
+    # fractured accounts and the (row_id, stripped_domain) pairs that survived filtering.
+    # row_id keeps duplicate queries in the chunk as separate accounts.
+    blocklist = load_blocklist(blocklist_path)
+    df_subset = filter_search_results(df_combined, 'link', blocklist, location_filter)
+    df_fractured = aggregate_fractured_domains(df_subset, ['row_id', 'input_restaurant', 'input_city'],
+                                               similarity_threshold, similarity_backend)
+    
+    return df_fractured.reset_index(drop=True), df_subset[['row_id', 'stripped_domain']]
+
+
+def score_records(record_lists, **scoring_options):
+
+    # One frame for the whole chunk, with a row_id per account
+    with metrics.stage('build_frames', rows_in=len(record_lists)) as stage:
+        df_combined = records_to_frame(record_lists)
+        stage.rows_out = len(df_combined)
+    
+    return score_frame(df_combined, **scoring_options)
+
+
+def index_domains(domain_index, account_keys, df_domains):
+
+    if domain_index is not None:
+        domain_index.add_pairs((account_keys[row_id] for row_id in df_domains['row_id']), df_domains['stripped_domain'])
+
+
+def score_batch(record_lists, account_keys=None, domain_index=None):
+
+    df_fractured, df_domains = score_records(record_lists)
+    index_domains(domain_index, account_keys, df_domains)
+    
+    return df_fractured
+
+
+def iter_deduplicated_fetches(rows, scraper_api, max_workers=1, adaptive_pages=None, idle_marker=None, window=None):
+
+    # Rows sharing an account key (sub-accounts, re-imports) are searched once and the result is fanned
+    # out to each of them. First occurrences are fetched in order, so a row's result is always available
+    # by the time it is reached; results are dropped once their last duplicate has been served.
+    # Accounts whose fetch failed (see ACCOUNT_ERRORS) are not yielded at all; idle_marker and window are
+    # passed through to ordered_map.
+    keys = [account_key(row) for row in rows]
+    remaining = Counter(keys)
+    first_rows = {}
+    for key, row in zip(keys, rows):
+        first_rows.setdefault(key, row)
+    unique_rows = list(first_rows.values())
+    if len(unique_rows) < len(rows):
+        logging.info(f"Coalesced {len(rows)} rows into {len(unique_rows)} unique queries")
+
+    fetched = ordered_map(lambda row: fetch_row_or_skip(row, scraper_api, adaptive_pages), unique_rows, max_workers,
+                          idle_marker, window)
+    shared = {}
+    skipped = 0
+    for row, key in zip(rows, keys):
+        if key not in shared:
+            records = next(fetched)
+            if idle_marker is not None and records is idle_marker:
+                yield idle_marker, None
+                records = next(fetched)
+            shared[key] = records
+        records = shared[key]
+        remaining[key] -= 1
+        if not remaining[key]:
+            del shared[key]
+        if records is None:
+            skipped += 1
+            continue
+        yield row, retag_records(records, row)
+
+    if skipped:
+        logging.warning(f"Skipped {skipped} accounts that could not be fetched; they are left for the next run")
+
+
+def retag_records(records, row):
+
+    # Duplicates may differ in case or spacing, so each row keeps its own query text on the shared results
+    full_query = f"{row['account_name']} {row['billing_address_line_1']}"
+    if not records or (records[0].input_restaurant == full_query and records[0].input_city == row['billing_city']):
+        return records
+    return [record._replace(input_restaurant=full_query, input_city=row['billing_city']) for record in records]
+
+
+# Stands in for a fetch that has not come back yet (see ordered_map)
+FETCH_PENDING = object()
+
+
+def iter_fetched_chunks(rows, scraper_api, max_workers=1, chunk_size=500, adaptive_pages=None, flush_when_idle=False):
+
+    # Workers only fetch; responses are grouped into chunks in input order while later requests are still in flight.
+    # With flush_when_idle, a chunk is also handed on as soon as the next response is not ready yet, so
+    # results are scored and written promptly without scoring accounts one at a time; up to a chunk of
+    # searches stays in flight meanwhile, so the next chunk grows while this one is scored.
+    pending_rows = []
+    pending_results = []
+    idle_marker, window = (FETCH_PENDING, chunk_size) if flush_when_idle else (None, None)
+    try:
+        for row, records in iter_deduplicated_fetches(rows, scraper_api, max_workers, adaptive_pages, idle_marker,
+                                                      window):
+            if row is FETCH_PENDING:
+                if pending_rows:
+                    yield pending_rows, pending_results
+                    pending_rows, pending_results = [], []
+                continue
+            pending_rows.append(row)
+            pending_results.append(records)
+            if len(pending_rows) >= chunk_size:
+                yield pending_rows, pending_results
+                pending_rows, pending_results = [], []
+    except SearchBudgetExceeded:
+        # Searches already paid for are still handed on before the budget error stops the batch
+        if pending_rows:
+            yield pending_rows, pending_results
+        raise
+    if pending_rows:
+        yield pending_rows, pending_results
+
+
+def iter_batch_results(rows, scraper_api, max_workers=1, chunk_size=500, domain_index=None, processes=None,
+                       raw_writer=None, adaptive_pages=None, flush_when_idle=False):
+
+    # Yields (chunk rows, scored frame with a row_id into the chunk) in input order
+    chunks = iter_fetched_chunks(rows, scraper_api, max_workers, chunk_size, adaptive_pages, flush_when_idle)
+    if raw_writer is not None:
+        chunks = store_raw_chunks(chunks, raw_writer)
+
+    if processes:
+        keyed_chunks = ((chunk_rows, [account_key(row) for row in chunk_rows], record_lists)
+                        for chunk_rows, record_lists in chunks)
+        yield from iter_scored_parallel(keyed_chunks, score_records, domain_index, processes)
+        return
+
+    for chunk_rows, record_lists in chunks:
+        yield chunk_rows, score_batch(record_lists, [account_key(row) for row in chunk_rows], domain_index)
+
+
+def store_raw_chunks(chunks, raw_writer):
+
+    # Persist every fetched chunk before it is scored, so its searches can be re-scored offline later
+    for chunk_rows, record_lists in chunks:
+        raw_writer.write([account_key(row) for row in chunk_rows], record_lists)
+        yield chunk_rows, record_lists
+
+
+def measured_call(func, data, metrics_enabled):
+
+    # Runs func in a worker process and returns its result along with the metrics it recorded, which
+    # would otherwise stay in the worker
+    metrics.enabled = metrics_enabled
+    metrics.reset()
+    return func(data), metrics.to_dict()
+
+
+def iter_scored_parallel(keyed_chunks, score_func, domain_index, processes):
+
+    # Chunks of (rows, account keys by row_id, data) are scored on a process pool while the producer keeps
+    # going; results are merged back in submission order, so output matches the serial path.
+    # Spawned workers avoid forking a threaded parent.
+    in_flight = deque()
+
+    def finish(chunk_rows, account_keys, future):
+        (df_fractured, df_domains), worker_metrics = future.result()
+        metrics.merge(worker_metrics)
+        index_domains(domain_index, account_keys, df_domains)
+        return chunk_rows, df_fractured
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+        try:
+            for chunk_rows, account_keys, chunk_data in keyed_chunks:
+                in_flight.append((chunk_rows, account_keys, pool.submit(measured_call, score_func, chunk_data, metrics.enabled)))
+                if len(in_flight) > processes * 2:
+                    yield finish(*in_flight.popleft())
+                # Chunks that are already scored are handed on without waiting for the pool to fill up
+                while in_flight and in_flight[0][2].done():
+                    yield finish(*in_flight.popleft())
+        except SearchBudgetExceeded:
+            while in_flight:
+                yield finish(*in_flight.popleft())
+            raise
+        while in_flight:
+            yield finish(*in_flight.popleft())
+
+
+def chunk_results_by_row(chunk_rows, df_scored):
+
+    # JSON-ready fractured-presence records for every row of the chunk, empty for rows without any
+    records = json.loads(df_scored.drop(columns=['row_id']).to_json(orient='records')) if not df_scored.empty else []
+    row_ids = df_scored['row_id'].tolist() if not df_scored.empty else []
+    results_by_row = [[] for _ in chunk_rows]
+    for row_id, record in zip(row_ids, records):
+        results_by_row[row_id].append(record)
+    return results_by_row
+
+
+def journal_key(row):
+
+    # Duplicate rows share an account key but not a sample position, so each is journaled (and resumed) on
+    # its own, with its own query text; a changed input CSV changes the keys rather than mixing runs
+    return f"{row['sample_position']}|{account_key(row)}"
+
+
+def journal_chunk(journal, chunk_rows, df_scored):
+
+    # Every account in the chunk is recorded, including those without a fractured presence
+    results_by_row = chunk_results_by_row(chunk_rows, df_scored)
+    journal.record([(journal_key(row), results) for row, results in zip(chunk_rows, results_by_row)])
+
+
+def pending_rows_for(rows, journal):
+
+    if journal is None:
+        return rows
+    remaining = [row for row in rows if not journal.is_done(journal_key(row))]
+    logging.info(f"Resuming from journal: {len(rows) - len(remaining)} accounts done, {len(remaining)} remaining")
+    return remaining
+
+
+def batch_process(filepath, scraper_api, sample_n, max_workers=1, chunk_size=500, journal=None, domain_index=None,
+                  processes=None, raw_writer=None, adaptive_pages=None, shard=None):
+    logging.info(f"Starting batch process for {sample_n} restaurants with {max_workers} workers")
+    df_raw = pd.read_csv(filepath)
+    logging.info("CSV loaded successfully")
+    df_formatted = standardize_columns(df_raw)
+    df_sampled = df_formatted.sample(n=int(sample_n), random_state=42)
+    rows = number_rows(row for _, row in df_sampled.iterrows())
+    if shard is not None:
+        rows = select_shard(rows, shard)
+    results_list = []
+
+    try:
+        for chunk_rows, df_scored in iter_batch_results(pending_rows_for(rows, journal), scraper_api, max_workers, chunk_size,
+                                                         domain_index, processes, raw_writer, adaptive_pages):
+            if journal is not None:
+                journal_chunk(journal, chunk_rows, df_scored)
+            if not df_scored.empty:
+                results_list.append(output_frame(df_scored, chunk_rows, shard))
+    except SearchBudgetExceeded as error:
+        logging.warning(f"Stopping batch early: {error}")
+
+    # With a journal, earlier runs' accounts are part of the output too, so rebuild it in sample order
+    if journal is not None:
+        return journal_output_frame(rows, journal, shard)
+
+    final_results = pd.concat(results_list, ignore_index=True) if results_list else pd.DataFrame()
+    return final_results
+
+
+def stream_batch_process(filepath, scraper_api, sample_n, output_path, max_workers=1, csv_chunksize=10000, journal=None,
+                         domain_index=None, processes=None, raw_writer=None, adaptive_pages=None, shard=None,
+                         chunk_size=500):
+    logging.info(f"Starting streaming batch process for {sample_n} restaurants with {max_workers} workers")
+    sampled_rows = number_rows(reservoir_sample(filepath, int(sample_n), chunksize=csv_chunksize))
+    if shard is not None:
+        sampled_rows = select_shard(sampled_rows, shard)
+    rows = pending_rows_for(sampled_rows, journal)
+
+    # Score the responses that have arrived as one chunk (up to chunk_size rows, or fewer when the next
+    # response is still in flight) and hand it to the output sink (JSON lines or Parquet, by extension).
+    # A resumed run appends to JSON lines output; a Parquet output is rewritten, starting with what the
+    # journal already holds.
+    resuming = journal is not None and len(journal) > 0
+    with open_output_writer(output_path, append=resuming) as output:
+        if resuming and not output.appendable:
+            output.write(journal_output_frame(sampled_rows, journal, shard))
+        try:
+            for chunk_rows, df_scored in iter_batch_results(rows, scraper_api, max_workers, chunk_size, domain_index,
+                                                            processes, raw_writer, adaptive_pages, flush_when_idle=True):
+                if not df_scored.empty:
+                    output.write(output_frame(df_scored, chunk_rows, shard))
+                if journal is not None:
+                    journal_chunk(journal, chunk_rows, df_scored)
+        except SearchBudgetExceeded as error:
+            logging.warning(f"Stopping batch early: {error}")
+
+    logging.info(f"Wrote {output.rows_written} fractured presence results to {output_path}")
+    return output.rows_written
+
+
+def journal_output_frame(rows, journal, shard=None):
+
+    # Output of the rows the journal has already completed, in sample order
+    records = [record if shard is None else {**record, 'sample_position': row['sample_position']}
+               for row in rows for record in journal.completed.get(journal_key(row), [])]
+    return pd.DataFrame(records)
+
+
+def retag_result(record, row):
+
+    # Shared results carry the query text they were searched with, so a duplicate row gets its own back
+    return {**record, 'input_restaurant': f"{row['account_name']} {row['billing_address_line_1']}",
+            'input_city': row['billing_city']}
+
+
+def read_accounts(filepath, id_column=None, chunksize=10000):
+
+    # Every account in the export, reading only the query columns (and the id column, if there is one)
+    wanted = set(INPUT_COLUMNS) | ({id_column} if id_column else set())
+    accounts = []
+    chunks = pd.read_csv(filepath, chunksize=chunksize, usecols=lambda column: standardize_column_name(column) in wanted)
+    for chunk in chunks:
+        accounts.extend(standardize_columns(chunk).to_dict('records'))
+    return accounts
+
+
+def account_fingerprint(row):
+
+    # Edits that only change case or spacing give the same search, so they do not count as changes
+    return hashlib.sha256(account_key(row).encode('utf-8')).hexdigest()
+
+
+def refresh_process(filepath, scraper_api, manifest, max_age_seconds=None, id_column=None, max_workers=1,
+                    chunk_size=500, domain_index=None, processes=None, raw_writer=None, adaptive_pages=None):
+    """Searches only the accounts that are new, edited or stale against the manifest and carries every
+    other account's verdict forward. Returns the output for the current export, in CSV order, without the
+    new or edited accounts the run did not get to."""
+    logging.info(f"Starting refresh of {filepath} against a manifest of {len(manifest)} accounts")
+    now = time.time()
+    # The id column is matched the way the export's headers are standardized ("Account ID" -> account_id)
+    id_column = standardize_column_name(id_column) if id_column else None
+    accounts = read_accounts(filepath, id_column)
+
+    # Without an id column an account is its normalized name, address and city, so an edit shows up as
+    # one account removed and another added
+    identities = [str(row[id_column]) if id_column else account_key(row) for row in accounts]
+    fingerprints = [account_fingerprint(row) for row in accounts]
+    statuses = [manifest.status(identity, fingerprint, max_age_seconds, now)
+                for identity, fingerprint in zip(identities, fingerprints)]
+    for status, count in Counter(statuses).items():
+        metrics.increment(f'refresh_{status}', count)
+    logging.info(f"Refresh plan: {dict(Counter(statuses))}")
+
+    # Rows carry their position in the export, since accounts that could not be fetched are not yielded
+    refreshed = {}
+    rows = [{**row, 'account_position': position}
+            for position, (row, status) in enumerate(zip(accounts, statuses)) if status != 'unchanged']
+    try:
+        for chunk_rows, df_scored in iter_batch_results(rows, scraper_api, max_workers, chunk_size, domain_index,
+                                                         processes, raw_writer, adaptive_pages):
+            for row, results in zip(chunk_rows, chunk_results_by_row(chunk_rows, df_scored)):
+                position = row['account_position']
+                refreshed[position] = {
+                    'identity': identities[position],
+                    'fingerprint': fingerprints[position],
+                    'refreshed_at': now,
+                    'results': results,
+                }
+    except SearchBudgetExceeded as error:
+        logging.warning(f"Stopping refresh early: {error}")
+    finally:
+        # Accounts that were not reached keep their previous entry (new ones have none), so the next
+        # refresh picks them up again. Rows sharing an identity share one manifest entry.
+        entries = [refreshed.get(position) or manifest.entries.get(identity)
+                   for position, identity in enumerate(identities)]
+        unique_entries = {}
+        for entry in entries:
+            if entry is not None:
+                unique_entries.setdefault(entry['identity'], entry)
+        manifest.save(list(unique_entries.values()))
+
+    logging.info(f"Searched {len(refreshed)} accounts and carried {statuses.count('unchanged')} forward")
+    # Only entries searched with the row's current text are output: an edited account that was not reached still
+    # has its old entry, whose results belong to the old address and must not be relabelled with the new one
+    current = [entry if entry is not None and entry['fingerprint'] == fingerprint else None
+               for entry, fingerprint in zip(entries, fingerprints)]
+    if current.count(None):
+        logging.warning(f"Left {current.count(None)} new or edited accounts that were not searched out of the output")
+    # A carried-forward entry holds the query text it was searched with, so each row gets its own back
+    records = [retag_result(record, row) for row, entry in zip(accounts, current) if entry is not None
+               for record in entry['results']]
+    return pd.DataFrame(records)
+
+
+def rescore_raw_results(raw_store, run_name, processes=None, domain_index=None, **scoring_options):
+    logging.info(f"Re-scoring stored raw results for run '{run_name}' with {scoring_options}")
+
+    # Each stored part is one fetched chunk; re-run only the filtering and aggregation stages over it
+    def keyed_parts():
+        for df_part in raw_store.iter_parts(run_name):
+            account_keys = dict(zip(df_part['row_id'], df_part['account_key']))
+            yield None, account_keys, df_part.drop(columns=['account_key'])
+
+    if processes:
+        scored = (df_fractured for _, df_fractured in
+                  iter_scored_parallel(keyed_parts(), partial(score_frame, **scoring_options), domain_index, processes))
+    else:
+        def score_serial():
+            for _, account_keys, df_part in keyed_parts():
+                df_fractured, df_domains = score_frame(df_part, **scoring_options)
+                index_domains(domain_index, account_keys, df_domains)
+                yield df_fractured
+        scored = score_serial()
+
+    results_list = [df_fractured.drop(columns=['row_id']) for df_fractured in scored if not df_fractured.empty]
+    final_results = pd.concat(results_list, ignore_index=True) if results_list else pd.DataFrame()
+    return final_results
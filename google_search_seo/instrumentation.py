@@ -0,0 +1,221 @@
+# instrumentation.py
+
+import bisect
+import json
+import threading
+import time
+from collections import defaultdict
+
+
+# Upper bounds in seconds; wide enough to cover both in-memory stages and network round trips
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram():
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+
+    def observe(self, value):
+
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+
+    def cumulative_counts(self):
+
+        counts = []
+        running = 0
+        for bucket_count in self.bucket_counts:
+            running += bucket_count
+            counts.append(running)
+        return counts
+
+
+class StageStats():
+
+    def __init__(self):
+
+        self.seconds = Histogram()
+        self.rows_in = 0
+        self.rows_out = 0
+
+
+class ActiveStage():
+    """Context manager for one timed stage; set rows_out before it exits to record the drop count."""
+
+    def __init__(self, metrics, name, rows_in):
+
+        self.metrics = metrics
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+
+    def __enter__(self):
+
+        self._start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback):
+
+        self.metrics.observe(self.name, time.perf_counter() - self._start, self.rows_in, self.rows_out)
+        return False
+
+
+class NullStage():
+    """Shared no-op stand-in returned while metrics are disabled, so instrumented code costs one call."""
+
+    rows_out = None
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback):
+
+        return False
+
+
+NULL_STAGE = NullStage()
+
+
+class Metrics():
+
+    def __init__(self, enabled=False):
+
+        self.enabled = enabled
+        self.stages = defaultdict(StageStats)
+        self.counters = defaultdict(int)
+        self.merged = None
+        self._lock = threading.Lock()
+
+
+    def stage(self, name, rows_in=None):
+
+        if not self.enabled:
+            return NULL_STAGE
+        return ActiveStage(self, name, rows_in)
+
+
+    def observe(self, name, seconds, rows_in=None, rows_out=None):
+
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.stages[name]
+            stats.seconds.observe(seconds)
+            if rows_in is not None and rows_out is not None:
+                stats.rows_in += rows_in
+                stats.rows_out += rows_out
+
+
+    def increment(self, name, value=1):
+
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += value
+
+
+    def merge(self, summary):
+
+        # Folds in a to_dict() summary recorded elsewhere, e.g. by a scoring worker process
+        if not self.enabled:
+            return
+        with self._lock:
+            self.merged = summary if self.merged is None else merge_summaries([self.merged, summary])
+
+
+    def reset(self):
+
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.merged = None
+
+
+    def to_dict(self):
+
+        with self._lock:
+            stages = {
+                name: {
+                    'calls': stats.seconds.count,
+                    'total_seconds': stats.seconds.total,
+                    'mean_seconds': stats.seconds.total / stats.seconds.count if stats.seconds.count else 0.0,
+                    'rows_in': stats.rows_in,
+                    'rows_out': stats.rows_out,
+                    'rows_dropped': stats.rows_in - stats.rows_out,
+                    'buckets': dict(zip([str(bound) for bound in stats.seconds.buckets] + ['+Inf'],
+                                        stats.seconds.cumulative_counts())),
+                }
+                for name, stats in self.stages.items()
+            }
+            summary = {'stages': stages, 'counters': dict(self.counters)}
+            return summary if self.merged is None else merge_summaries([summary, self.merged])
+
+
+    def to_json(self):
+
+        return json.dumps(self.to_dict(), indent=2)
+
+
+    def to_prometheus(self, prefix='seo'):
+
+        summary = self.to_dict()
+        lines = [f"# TYPE {prefix}_stage_seconds histogram"]
+        for name, stats in summary['stages'].items():
+            for bound, count in stats['buckets'].items():
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stats["total_seconds"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stats["calls"]}')
+        lines.append(f"# TYPE {prefix}_stage_rows_in_total counter")
+        lines += [f'{prefix}_stage_rows_in_total{{stage="{name}"}} {stats["rows_in"]}' for name, stats in summary['stages'].items()]
+        lines.append(f"# TYPE {prefix}_stage_rows_out_total counter")
+        lines += [f'{prefix}_stage_rows_out_total{{stage="{name}"}} {stats["rows_out"]}' for name, stats in summary['stages'].items()]
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        lines += [f'{prefix}_events_total{{event="{name}"}} {value}' for name, value in summary['counters'].items()]
+        return "\n".join(lines) + "\n"
+
+
+    def write(self, path):
+
+        # Prometheus text for .prom/.txt paths, JSON otherwise
+        content = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+
+
+def merge_summaries(summaries):
+    """Adds up Metrics.to_dict() summaries from several processes or shard runs into one."""
+    stages = {}
+    counters = defaultdict(int)
+
+    for summary in summaries:
+        for name, value in summary.get('counters', {}).items():
+            counters[name] += value
+        for name, stats in summary.get('stages', {}).items():
+            merged = stages.setdefault(name, {'calls': 0, 'total_seconds': 0.0, 'rows_in': 0, 'rows_out': 0,
+                                              'buckets': dict.fromkeys(stats['buckets'], 0)})
+            for key in ('calls', 'total_seconds', 'rows_in', 'rows_out'):
+                merged[key] += stats[key]
+            for bound, count in stats['buckets'].items():
+                merged['buckets'][bound] += count
+
+    for merged in stages.values():
+        merged['mean_seconds'] = merged['total_seconds'] / merged['calls'] if merged['calls'] else 0.0
+        merged['rows_dropped'] = merged['rows_in'] - merged['rows_out']
+
+    return {'stages': stages, 'counters': dict(counters)}
+
+
+# Process-wide registry; disabled until a run opts in
+metrics = Metrics(enabled=False)
@@ -0,0 +1,40 @@
+# location.py
+
+from functools import lru_cache
+
+
+def clean_token(token):
+    """Removes non-alphanumeric characters, converts to lowercase, and excludes single-letter tokens."""
+    cleaned_token = ''.join(char for char in token if char.isalnum()).lower()
+    return cleaned_token if len(cleaned_token) > 1 else ''
+
+
+@lru_cache(maxsize=65536)
+def location_tokens(input_restaurant, input_city):
+    """Tokenizes a (restaurant, city) pair once, returning the address tokens and the refined restaurant tokens."""
+    restaurant_tokens = {clean_token(token) for token in input_restaurant.lower().split()}
+    address_tokens = {clean_token(token) for token in input_city.lower().split()}
+
+    # Remove address tokens from restaurant tokens
+    refined_restaurant_tokens = restaurant_tokens - address_tokens
+    refined_restaurant_tokens.discard('')
+
+    return frozenset(address_tokens), frozenset(refined_restaurant_tokens)
+
+
+@lru_cache(maxsize=65536)
+def domain_tokens(domain):
+    """Splits a domain into cleaned dot-separated parts, facilitating broad match searches."""
+    return tuple(clean_token(domain_token) for domain_token in domain.lower().split('.'))
+
+
+def is_location_domain(input_restaurant, input_city, domain):
+    """Flags domains that contain every address token but none of the refined restaurant tokens."""
+    address_tokens, refined_restaurant_tokens = location_tokens(input_restaurant, input_city)
+    parts = domain_tokens(domain)
+
+    def token_in_domain(token):
+        return any(token in part for part in parts)
+
+    return all(token_in_domain(token) for token in address_tokens) and \
+        not any(token_in_domain(token) for token in refined_restaurant_tokens)
@@ -0,0 +1,156 @@
+# output.py
+#
+# Output sinks for fractured-presence results. A writer takes scored frames as they are produced
+# (write(df)) and finalizes on close(), so no stage ever builds the whole output as one string.
+#
+#   .parquet           ParquetOutputWriter: row groups flushed as they fill, unique_domain_list stored
+#                      as a list of dictionary-encoded strings
+#   anything else      JsonLinesOutputWriter: compact JSON lines, appendable, also usable on stdout
+#
+# Downstream jobs can memory-map the Parquet output: pyarrow.parquet.read_table(path, memory_map=True)
+# restores the dictionary-encoded domain column without expanding every domain string.
+
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# Arrow types of the columns the pipeline emits; any other column is inferred
+OUTPUT_TYPES = {
+    'input_restaurant': pa.string(),
+    'input_city': pa.string(),
+    'unique_domain_list': pa.list_(pa.dictionary(pa.int32(), pa.string())),
+    'unique_domain_count': pa.int32(),
+    'sample_position': pa.int64(),
+}
+
+
+def output_schema(df):
+
+    fields = []
+    for column in df.columns:
+        column_type = OUTPUT_TYPES.get(column) or pa.Array.from_pandas(df[column]).type
+        fields.append(pa.field(column, column_type))
+    return pa.schema(fields)
+
+
+class JsonLinesOutputWriter():
+    """Compact JSON lines, flushed after every write so a crash keeps everything written before it."""
+
+    appendable = True
+
+    def __init__(self, path=None, append=False):
+
+        self.path = path
+        self._handle = open(path, 'a' if append else 'w', encoding='utf-8') if path else sys.stdout
+        self.rows_written = 0
+
+
+    def write(self, df):
+
+        if df.empty:
+            return
+        self._handle.write(df.to_json(orient='records', lines=True).rstrip('\n') + '\n')
+        self._handle.flush()
+        self.rows_written += len(df)
+
+
+    def close(self):
+
+        if self.path:
+            self._handle.close()
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback):
+
+        self.close()
+        return False
+
+
+class ParquetOutputWriter():
+    """Buffers scored frames and flushes them as Parquet row groups of row_group_size rows.
+
+    The file is written under a temporary name and moved into place on close, so readers never see a
+    file without its footer. Parquet files cannot be appended to; a resumed run rewrites the output."""
+
+    appendable = False
+
+    def __init__(self, path, row_group_size=50000, compression='zstd'):
+
+        self.path = path
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.rows_written = 0
+        self._temp_path = f"{path}.tmp"
+        self._writer = None
+        self._schema = None
+        self._buffer = []
+        self._buffered_rows = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+
+    def write(self, df):
+
+        if df.empty:
+            return
+        self._buffer.append(df)
+        self._buffered_rows += len(df)
+        if self._buffered_rows >= self.row_group_size:
+            self.flush()
+
+
+    def flush(self):
+
+        if not self._buffer:
+            return
+        df_group = pd.concat(self._buffer, ignore_index=True)
+        self._buffer = []
+        self._buffered_rows = 0
+
+        if self._writer is None:
+            self._schema = output_schema(df_group)
+            self._writer = pq.ParquetWriter(self._temp_path, self._schema, compression=self.compression)
+        table = pa.Table.from_pandas(df_group, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self.rows_written += len(df_group)
+
+
+    def close(self):
+
+        self.flush()
+        if self._writer is None:
+            # Nothing was fractured; still leave a readable (empty) file behind
+            self._writer = pq.ParquetWriter(self._temp_path, pa.schema(
+                [pa.field(column, column_type) for column, column_type in OUTPUT_TYPES.items()
+                 if column != 'sample_position']))
+        self._writer.close()
+        os.replace(self._temp_path, self.path)
+
+
+    def __enter__(self):
+
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback):
+
+        self.close()
+        return False
+
+
+def open_output_writer(path=None, append=False):
+    """Picks the sink from the path's extension; no path means JSON lines on stdout."""
+    if path and path.endswith('.parquet'):
+        return ParquetOutputWriter(path)
+    return JsonLinesOutputWriter(path, append)
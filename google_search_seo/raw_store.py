@@ -0,0 +1,88 @@
+# raw_store.py
+
+import glob
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from google_search_seo.api_manager import records_to_frame
+
+
+class RawResultStore():
+    """Parquet store of raw search results, partitioned by run (root/run=<name>/part-NNNNN.parquet).
+
+    Each part file holds one fetched chunk: the SearchResult columns, a row_id into the chunk and the
+    account key, so the filtering and aggregation stages can be replayed later without any API calls."""
+
+    def __init__(self, root='raw_results'):
+
+        self.root = root
+
+
+    def run_path(self, run_name):
+
+        return os.path.join(self.root, f"run={run_name}")
+
+
+    def runs(self):
+
+        return sorted(os.path.basename(path)[len("run="):] for path in glob.glob(os.path.join(self.root, "run=*")))
+
+
+    def part_paths(self, run_name):
+
+        return sorted(glob.glob(os.path.join(self.run_path(run_name), "part-*.parquet")))
+
+
+    def writer(self, run_name, overwrite=False):
+
+        if overwrite:
+            shutil.rmtree(self.run_path(run_name), ignore_errors=True)
+        return RawResultWriter(self, run_name)
+
+
+    def read_part(self, path, columns=None):
+
+        return pd.read_parquet(path, columns=columns)
+
+
+    def iter_parts(self, run_name, columns=None):
+
+        for path in self.part_paths(run_name):
+            yield self.read_part(path, columns)
+
+
+    def read(self, run_name, columns=None):
+
+        frames = list(self.iter_parts(run_name, columns))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+class RawResultWriter():
+
+    def __init__(self, store, run_name):
+
+        self.store = store
+        self.run_name = run_name
+        self.path = store.run_path(run_name)
+        os.makedirs(self.path, exist_ok=True)
+
+        # Continue numbering after existing parts so a resumed run appends instead of overwriting
+        self.next_part = len(store.part_paths(run_name))
+
+
+    def write(self, account_keys, record_lists):
+
+        df_chunk = records_to_frame(record_lists)
+        df_chunk.insert(1, 'account_key', [account_keys[row_id] for row_id in df_chunk['row_id']])
+
+        part_path = os.path.join(self.path, f"part-{self.next_part:05d}.parquet")
+        temp_path = f"{part_path}.tmp"
+        pq.write_table(pa.Table.from_pandas(df_chunk, preserve_index=False), temp_path)
+        os.replace(temp_path, part_path)
+        self.next_part += 1
+
+        return part_path
@@ -0,0 +1,189 @@
+# service.py
+#
+# Long-running scoring service for on-demand fractured-presence checks. One process keeps the SerpAPI
+# client (and its response cache and rate limiter), the compiled blocklist and the public suffix trie
+# warm, so a request pays for the search and the scoring, not for start-up.
+#
+#   POST /score     one account object, or a JSON list of them (scored concurrently, answered in order)
+#   GET  /metrics   Prometheus text of per-stage latencies and counters (?format=json for JSON)
+#   GET  /healthz   liveness
+#
+# Accounts use the CSV's column names: account_name, billing_address_line_1, billing_city.
+# Tests and benchmarks pass a SerpAPI built with a fake search_client to make_server().
+
+import json
+import logging
+import os
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from google_search_seo.api_manager import CacheMiss, SearchBudgetExceeded
+from google_search_seo.blocklist import load_blocklist
+from google_search_seo.domains import load_public_suffixes
+from google_search_seo.instrumentation import metrics
+from google_search_seo.single_record import score_record
+
+
+class BadRequest(Exception):
+    """Raised for request bodies that are not an account or a list of accounts."""
+
+
+class ScoringService():
+
+    def __init__(self, scraper_api, max_workers=8, **scoring_options):
+
+        self.scraper_api = scraper_api
+        self.scoring_options = scoring_options
+        self.executor = ThreadPoolExecutor(max_workers)
+
+        # Compile the filters once, before the first request rather than during it
+        load_blocklist(scoring_options.get('blocklist_path'))
+        load_public_suffixes()
+
+
+    def score_account(self, account):
+
+        if not isinstance(account, dict) or not account.get('account_name'):
+            raise BadRequest("Each account needs at least an account_name")
+
+        # Create search query, combining restaurant name and address
+        full_query = f"{account['account_name']} {account.get('billing_address_line_1', '')}"
+        city = account.get('billing_city', '')
+        records = self.scraper_api.get_search_records(query_restaurant=full_query, query_location=city)
+        return score_record(full_query, city, records, **self.scoring_options)
+
+
+    def score_accounts(self, accounts):
+
+        # Identical accounts in concurrent requests share one search through SerpAPI's in-flight coalescing
+        with metrics.stage('service_batch', rows_in=len(accounts)) as stage:
+            verdicts = list(self.executor.map(self.score_account, accounts))
+            stage.rows_out = sum(verdict['fractured'] for verdict in verdicts)
+        return verdicts
+
+
+    def close(self):
+
+        self.executor.shutdown(wait=True)
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+
+    # Keep-alive, so a client reusing its connection skips the TCP (and proxy TLS) setup per check.
+    # Headers and body go out in separate writes, so without TCP_NODELAY Nagle's algorithm holds the body
+    # back until the client's delayed ACK, stalling every keep-alive request by ~40 ms
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+
+    def send_body(self, status, body, content_type='application/json'):
+
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+    def send_json(self, status, body):
+
+        self.send_body(status, json.dumps(body))
+
+
+    def do_GET(self):
+
+        url = urlsplit(self.path)
+        if url.path == '/healthz':
+            self.send_json(200, {'status': 'ok'})
+        elif url.path == '/metrics':
+            if 'format=json' in url.query:
+                self.send_body(200, metrics.to_json())
+            else:
+                self.send_body(200, metrics.to_prometheus(), 'text/plain; version=0.0.4')
+        else:
+            self.send_json(404, {'error': f"Unknown path {url.path}"})
+
+
+    def do_POST(self):
+
+        try:
+            payload = self.read_body()
+        except BadRequest as error:
+            metrics.increment('service_bad_requests')
+            self.send_json(400, {'error': str(error)})
+            return
+        if urlsplit(self.path).path != '/score':
+            self.send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+
+        with metrics.stage('service_request'):
+            try:
+                body = json.loads(payload or 'null')
+                is_batch = isinstance(body, list)
+                verdicts = self.server.service.score_accounts(body if is_batch else [body])
+                self.send_json(200, verdicts if is_batch else verdicts[0])
+            except (BadRequest, json.JSONDecodeError) as error:
+                metrics.increment('service_bad_requests')
+                self.send_json(400, {'error': str(error)})
+            except (SearchBudgetExceeded, CacheMiss) as error:
+                metrics.increment('service_unavailable')
+                self.send_json(503, {'error': str(error)})
+            except Exception as error:
+                logging.exception("Scoring request failed")
+                metrics.increment('service_errors')
+                self.send_json(502, {'error': str(error)})
+
+
+    def read_body(self):
+
+        # The body is read before any reply, including a 404, or its bytes would be parsed as the next request
+        # on this keep-alive connection
+        content_length = self.headers.get('Content-Length', '0')
+        try:
+            length = int(content_length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # Without a usable length the rest of the stream cannot be framed, so the connection is closed
+            self.close_connection = True
+            raise BadRequest(f"Invalid Content-Length {content_length!r}")
+        return self.rfile.read(length)
+
+
+    def address_string(self):
+
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+
+    def log_message(self, format, *args):
+
+        logging.debug(f"{self.address_string()} - {format % args}")
+
+
+class UnixScoringRequestHandler(ScoringRequestHandler):
+
+    # TCP_NODELAY cannot be set on a Unix socket, which does not delay small writes anyway
+    disable_nagle_algorithm = False
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+
+def make_server(service, host='127.0.0.1', port=8080, unix_socket=None):
+    """Builds a thread-per-connection HTTP server over TCP, or over a Unix socket when one is given."""
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = ThreadingUnixHTTPServer(unix_socket, UnixScoringRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ScoringRequestHandler)
+    server.service = service
+    return server
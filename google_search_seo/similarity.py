@@ -0,0 +1,82 @@
+# similarity.py
+
+import difflib
+from collections import Counter
+
+
+DEFAULT_THRESHOLD = 0.7
+
+
+def calculate_ratio(matches, length):
+    """Same formula as difflib's ratio helpers, so bounds compare exactly against SequenceMatcher.ratio()."""
+    return 2.0 * matches / length if length else 1.0
+
+
+def difflib_has_similar_pair(domain_list, threshold=DEFAULT_THRESHOLD):
+    """Exact difflib decisions: prunes pairs with the length and character-count upper bounds
+    (difflib's real_quick_ratio and quick_ratio) before paying for a full ratio."""
+    char_counts = [Counter(domain) for domain in domain_list]
+
+    for i in range(len(domain_list)):
+        for j in range(i+1, len(domain_list)):
+            length = len(domain_list[i]) + len(domain_list[j])
+            if calculate_ratio(min(len(domain_list[i]), len(domain_list[j])), length) <= threshold:
+                continue
+            shared_chars = sum((char_counts[i] & char_counts[j]).values())
+            if calculate_ratio(shared_chars, length) <= threshold:
+                continue
+            if difflib.SequenceMatcher(None, domain_list[i], domain_list[j]).ratio() > threshold:
+                return True
+
+    return False
+
+
+def levenshtein_has_similar_pair(domain_list, threshold=DEFAULT_THRESHOLD):
+    """Uses the C-backed Levenshtein ratio; faster, but not guaranteed to agree with difflib."""
+    try:
+        import Levenshtein
+    except ImportError as error:
+        raise ImportError("The 'levenshtein' similarity backend requires python-levenshtein") from error
+
+    for i in range(len(domain_list)):
+        for j in range(i+1, len(domain_list)):
+            length = len(domain_list[i]) + len(domain_list[j])
+            if calculate_ratio(min(len(domain_list[i]), len(domain_list[j])), length) <= threshold:
+                continue
+            if Levenshtein.ratio(domain_list[i], domain_list[j]) > threshold:
+                return True
+
+    return False
+
+
+def ngram_has_similar_pair(domain_list, threshold=DEFAULT_THRESHOLD, ngram_range=(2, 3)):
+    """Computes the full cosine similarity matrix over character n-gram TF-IDF vectors in one shot."""
+    try:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
+    except ImportError as error:
+        raise ImportError("The 'ngram' similarity backend requires scikit-learn") from error
+    import numpy as np
+
+    if len(domain_list) < 2:
+        return False
+
+    # Boundary markers keep very short domains from producing an empty n-gram vocabulary
+    padded = [f"^{domain}$" for domain in domain_list]
+    vectors = TfidfVectorizer(analyzer='char', ngram_range=ngram_range, lowercase=True).fit_transform(padded)
+    scores = cosine_similarity(vectors)
+    return bool((np.triu(scores, k=1) > threshold).any())
+
+
+SIMILARITY_BACKENDS = {
+    'difflib': difflib_has_similar_pair,
+    'levenshtein': levenshtein_has_similar_pair,
+    'ngram': ngram_has_similar_pair,
+}
+
+
+def has_similar_pair(domain_list, threshold=DEFAULT_THRESHOLD, backend='difflib'):
+
+    if backend not in SIMILARITY_BACKENDS:
+        raise ValueError(f"Unknown similarity backend '{backend}', expected one of {sorted(SIMILARITY_BACKENDS)}")
+    return SIMILARITY_BACKENDS[backend](domain_list, threshold)
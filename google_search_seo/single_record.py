@@ -0,0 +1,43 @@
+# single_record.py
+#
+# The filtering and aggregation steps of helpers.score_frame for one account, on plain lists instead of
+# DataFrames. Importing this module never loads pandas or numpy, which keeps short single-record
+# invocations down to interpreter start-up plus the search itself.
+
+from google_search_seo.blocklist import load_blocklist
+from google_search_seo.domains import registrable_domain_of_link
+from google_search_seo.location import is_location_domain
+from google_search_seo.similarity import DEFAULT_THRESHOLD, has_similar_pair
+
+
+def filter_records(records, blocklist=None, location_filter=True):
+    """Returns the (record, stripped domain) pairs that survive the blocklist and location filters."""
+    blocklist = blocklist if blocklist is not None else load_blocklist()
+
+    kept = []
+    for record in records:
+        if blocklist.matches_link(record.link):
+            continue
+        domain = registrable_domain_of_link(record.link)
+        if location_filter and is_location_domain(record.input_restaurant, record.input_city, domain):
+            continue
+        kept.append((record, domain))
+
+    return kept
+
+
+def score_record(query_restaurant, query_location, records, blocklist_path=None,
+                 similarity_threshold=DEFAULT_THRESHOLD, similarity_backend='difflib', location_filter=True):
+    """Scores one account's search results; the verdict matches what batch scoring reports for it."""
+    kept = filter_records(records, load_blocklist(blocklist_path), location_filter)
+    unique_domain_list = list(dict.fromkeys(domain for _, domain in kept))
+    is_fractured = len(unique_domain_list) > 1 and \
+        bool(has_similar_pair(unique_domain_list, similarity_threshold, similarity_backend))
+
+    return {
+        'input_restaurant': query_restaurant,
+        'input_city': query_location,
+        'unique_domain_list': unique_domain_list,
+        'unique_domain_count': len(unique_domain_list),
+        'fractured': is_fractured,
+    }
@@ -0,0 +1,84 @@
+# transport.py
+#
+# HTTP transports behind SerpAPI. A transport is any object with search(params) -> response dict and
+# close(); SerpAPI calls it for every live search, so tests and benchmarks can point it at a local mock
+# server (base_url) or replace it outright.
+
+import json
+import threading
+
+
+SERPAPI_URL = 'https://serpapi.com/search'
+
+
+def request_params(params, engine):
+
+    # Same query string the serpapi client library sends
+    return {'engine': engine, **params, 'source': 'python', 'output': 'json'}
+
+
+class SessionTransport():
+    """Keep-alive requests.Session with a bounded connection pool, so concurrent searches reuse warm
+    TLS connections instead of opening one per query. The session (and requests itself) is only set up
+    on the first search, so answering from the cache never pays for it."""
+
+    def __init__(self, base_url=SERPAPI_URL, pool_size=10, connect_timeout=5.0, read_timeout=60.0, engine='google'):
+
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.engine = engine
+        self.session = None
+        self._session_lock = threading.Lock()
+
+
+    def get_session(self):
+
+        with self._session_lock:
+            if self.session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                # pool_block makes extra threads wait for a free connection rather than open throwaway ones
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.session = session
+        return self.session
+
+
+    def search(self, params):
+
+        # SerpAPI reports errors as JSON with a 4xx status, so the body is parsed whatever the status;
+        # a non-JSON body (proxy error page) raises JSONDecodeError, which SerpAPI treats as retryable.
+        # Throttling (429) and server faults (5xx) raise HTTPError so they are retried too
+        response = self.get_session().get(self.base_url, params=request_params(params, self.engine), timeout=self.timeout)
+        if response.status_code == 429 or response.status_code >= 500:
+            response.raise_for_status()
+        return json.loads(response.text)
+
+
+    def close(self):
+
+        if self.session is not None:
+            self.session.close()
+
+
+class SearchClientTransport():
+    """Adapts a GoogleSearch-style class (built per query, answering get_dict()) to the transport interface."""
+
+    def __init__(self, search_client):
+
+        self.search_client = search_client
+
+
+    def search(self, params):
+
+        # The serpapi client adds engine/source/output to the dict it is given, so hand it a copy
+        return self.search_client(dict(params)).get_dict()
+
+
+    def close(self):
+
+        pass
@@ -0,0 +1,11 @@
+# run_rescore.py
+#
+# Kept for existing jobs; equivalent to `google-search-seo rescore ...` (see google_search_seo/cli.py).
+
+import sys
+
+from google_search_seo.cli import main
+
+
+if __name__ == '__main__':
+    main(['rescore', *sys.argv[1:]])
@@ -0,0 +1,279 @@
+# benchmark_pipeline.py
+#
+# Offline benchmark of the full pipeline against a local stand-in for serpapi.GoogleSearch.
+# Run from the repository root:
+#
+#   python -m scripts.benchmark_pipeline --sizes 1000 10000 100000 --latency-ms 50 --workers 32
+#   python -m scripts.benchmark_pipeline --replay-cache .cache/serp_responses.sqlite --sizes 1000
+#   python -m scripts.benchmark_pipeline --mock-server --sizes 1000 --latency-ms 20 --workers 16
+#
+# Every stage is timed separately over the whole batch, so a regression in one filter shows up
+# on its own line instead of being hidden inside network wait.
+
+import argparse
+import hashlib
+import json
+import random
+import resource
+import sqlite3
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from google_search_seo.api_manager import SerpAPI, SearchResult, records_to_frame
+from google_search_seo.transport import SessionTransport
+from google_search_seo.helpers import (
+    ordered_map,
+    remove_blacklisted_domains,
+    remove_correlated_domains,
+    remove_location_domains,
+    group_unique_domains,
+    remove_low_similarity_domains
+)
+
+
+NAME_WORDS = ["Niki's", "Paradise", "Tavern", "Golden", "Blozzom", "Albertano's", "Lucky", "Corner", "Rosa's", "Casa"]
+CUISINE_WORDS = ["Pizza", "Grill", "Bar", "Kitchen", "Taqueria", "Pasta", "Diner", "Sushi", "Cafe", "BBQ"]
+CITIES = ["Cedar Park", "Orlando", "Bozeman", "Southington", "Miami Beach", "Austin", "Denver", "Portland"]
+DIRECTORY_HOSTS = ["www.yelp.com", "www.tripadvisor.com", "www.facebook.com", "www.doordash.com", "www.mapquest.com",
+                   "order.toasttab.com", "www.restaurantji.com", "www.grubhub.com", "www.opentable.com"]
+OTHER_HOSTS = ["www.allmenus.com", "www.zomato.com", "www.menuism.com", "www.localeats.com", "www.wanderlog.com"]
+
+
+def synthetic_accounts(n, seed=0):
+
+    rng = random.Random(seed)
+    return [
+        {
+            'account_name': f"{rng.choice(NAME_WORDS)} {rng.choice(CUISINE_WORDS)} {i}",
+            'billing_address_line_1': f"{rng.randint(1, 9999)} Main St",
+            'billing_city': rng.choice(CITIES),
+        }
+        for i in range(n)
+    ]
+
+
+def synthetic_response(params, results_per_query=10):
+
+    # Deterministic per query: the same params always produce the same payload
+    seed = int(hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16], 16)
+    rng = random.Random(seed)
+    slug = ''.join(char for char in params['q'].split(' ')[0].lower() if char.isalnum())
+    city_slug = params.get('location', 'city').replace(' ', '').lower()
+    own_hosts = [f"www.{slug}.com", f"{slug}{rng.choice(['pizza', 'grill', 'eats'])}.com", f"order.{slug}.com"]
+
+    results = []
+    for position in range(1, results_per_query + 1):
+        roll = rng.random()
+        if roll < 0.45:
+            host = rng.choice(DIRECTORY_HOSTS)
+        elif roll < 0.7:
+            host = rng.choice(own_hosts)
+        elif roll < 0.8:
+            host = f"www.{city_slug}magazine.com"
+        else:
+            host = rng.choice(OTHER_HOSTS)
+        results.append({
+            "position": position,
+            "title": f"{params['q']} - result {position}",
+            "link": f"https://{host}/{slug}-{rng.randint(1, 999)}",
+            "displayed_link": host,
+            "snippet": "Synthetic snippet.",
+            "snippet_highlighted_words": [slug],
+            "favicon": "https://example.invalid/favicon.ico",
+        })
+
+    return {"organic_results": results}
+
+
+def make_fake_search(latency_seconds=0.0, replay_responses=None):
+    """Builds a GoogleSearch stand-in: replays recorded payloads round-robin, or synthesizes them."""
+
+    class FakeGoogleSearch():
+
+        replay_counter = 0
+
+        def __init__(self, params):
+
+            self.params = params
+
+
+        def get_dict(self):
+
+            if latency_seconds:
+                time.sleep(latency_seconds)
+            if replay_responses:
+                FakeGoogleSearch.replay_counter += 1
+                return replay_responses[FakeGoogleSearch.replay_counter % len(replay_responses)]
+            return synthetic_response(self.params)
+
+    return FakeGoogleSearch
+
+
+def start_mock_server(latency_seconds=0.0, replay_responses=None):
+    """Serves the fake search over local HTTP, so the real pooled transport is exercised end to end."""
+    fake_search = make_fake_search(latency_seconds, replay_responses)
+
+    class MockSerpAPIHandler(BaseHTTPRequestHandler):
+
+        # Keep-alive like SerpAPI, with TCP_NODELAY so the body is not held back until the client's delayed ACK,
+        # which would add ~40 ms to every pooled request and swamp the transport being measured
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+
+            params = dict(parse_qsl(urlsplit(self.path).query))
+            params = {key: value for key, value in params.items() if key not in ('engine', 'source', 'output')}
+            payload = json.dumps(fake_search(params).get_dict()).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+
+        def log_message(self, format, *args):
+
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockSerpAPIHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_cached_responses(cache_path):
+
+    with sqlite3.connect(cache_path) as conn:
+        return [json.loads(response) for (response,) in conn.execute("SELECT response FROM responses")]
+
+
+def time_stage(timings, name, func, *args):
+
+    start = time.perf_counter()
+    result = func(*args)
+    timings[name] = time.perf_counter() - start
+    return result
+
+
+def run_benchmark(n_accounts, latency_seconds, workers, replay_responses=None, trace_memory=False, mock_server=False):
+
+    if mock_server:
+        server = start_mock_server(latency_seconds, replay_responses)
+        transport = SessionTransport(f"http://127.0.0.1:{server.server_address[1]}/search", pool_size=workers)
+        scraper_api = SerpAPI("benchmark", transport=transport)
+    else:
+        scraper_api = SerpAPI("benchmark", search_client=make_fake_search(latency_seconds, replay_responses))
+    accounts = synthetic_accounts(n_accounts)
+    queries = [(f"{row['account_name']} {row['billing_address_line_1']}", row['billing_city']) for row in accounts]
+    timings = {}
+
+    if trace_memory:
+        tracemalloc.start()
+    run_start = time.perf_counter()
+
+    # Fetch: per-call latency through the same bounded worker pool the batch uses
+    def timed_fetch(query):
+        start = time.perf_counter()
+        response = scraper_api.fetch_response(scraper_api.build_params(*query))
+        return response, time.perf_counter() - start
+
+    fetch_start = time.perf_counter()
+    fetched = list(ordered_map(timed_fetch, queries, workers))
+    timings['fetch'] = time.perf_counter() - fetch_start
+    responses = [response for response, _ in fetched]
+    latencies = np.array([latency for _, latency in fetched])
+
+    transformed = time_stage(timings, 'extract_organic_results',
+                             lambda: [scraper_api.extract_organic_results(response) for response in responses])
+
+    def build_frames():
+        record_lists = [[SearchResult(query, city, **result) for result in results]
+                        for results, (query, city) in zip(transformed, queries)]
+        return records_to_frame(record_lists)
+
+    df_results = time_stage(timings, 'build_frames', build_frames)
+    df_reduced = time_stage(timings, 'remove_blacklisted_domains', remove_blacklisted_domains, df_results, 'link')
+    df_stripped = time_stage(timings, 'remove_correlated_domains', remove_correlated_domains, df_reduced, 'link')
+    df_subset = time_stage(timings, 'remove_location_domains', remove_location_domains, df_stripped)
+
+    def aggregate():
+        df_aggregated = group_unique_domains(df_subset, ['row_id', 'input_restaurant', 'input_city'])
+        df_aggregated['unique_domain_count'] = df_aggregated['unique_domain_list'].apply(len)
+        return df_aggregated[df_aggregated['unique_domain_count'] > 1]
+
+    df_fractured = time_stage(timings, 'groupby_aggregation', aggregate)
+    df_final = time_stage(timings, 'remove_low_similarity_domains', remove_low_similarity_domains, df_fractured)
+
+    total = time.perf_counter() - run_start
+    scraper_api.close()
+    if mock_server:
+        server.shutdown()
+        server.server_close()
+    if trace_memory:
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    else:
+        peak_bytes = None
+
+    return {
+        'accounts': n_accounts,
+        'result_rows': len(df_results),
+        'fractured_accounts': len(df_final),
+        'total_seconds': total,
+        'throughput_accounts_per_second': n_accounts / total if total else float('inf'),
+        'fetch_latency_p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'fetch_latency_p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'stage_seconds': timings,
+        'traced_peak_mb': peak_bytes / 2**20 if peak_bytes is not None else None,
+        'process_max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def print_report(report):
+
+    print(f"\n== {report['accounts']:,} accounts, {report['result_rows']:,} result rows, "
+          f"{report['fractured_accounts']:,} fractured ==")
+    for stage, seconds in report['stage_seconds'].items():
+        share = seconds / report['total_seconds'] * 100 if report['total_seconds'] else 0
+        print(f"  {stage:<32} {seconds:9.3f}s  {share:5.1f}%")
+    print(f"  {'total':<32} {report['total_seconds']:9.3f}s")
+    print(f"  throughput {report['throughput_accounts_per_second']:,.0f} accounts/s, "
+          f"fetch p50 {report['fetch_latency_p50_ms']:.1f} ms, p95 {report['fetch_latency_p95_ms']:.1f} ms")
+    memory = f"traced peak {report['traced_peak_mb']:.1f} MB, " if report['traced_peak_mb'] is not None else ""
+    print(f"  {memory}process max RSS {report['process_max_rss_mb']:.1f} MB")
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark the search pipeline against a local fake SerpAPI.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="Account counts to run")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Simulated latency per search")
+    parser.add_argument('--workers', type=int, default=16, help="Concurrent fetch workers")
+    parser.add_argument('--replay-cache', help="Replay raw responses from a ResponseCache SQLite file")
+    parser.add_argument('--trace-memory', action='store_true', help="Measure peak Python allocations (slower)")
+    parser.add_argument('--mock-server', action='store_true',
+                        help="Serve the fake search over local HTTP and fetch through the pooled session transport")
+    parser.add_argument('--json', help="Also write the reports to this JSON file")
+    args = parser.parse_args()
+
+    replay_responses = load_cached_responses(args.replay_cache) if args.replay_cache else None
+    reports = []
+    for size in args.sizes:
+        report = run_benchmark(size, args.latency_ms / 1000, args.workers, replay_responses, args.trace_memory,
+                               args.mock_server)
+        print_report(report)
+        reports.append(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(reports, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
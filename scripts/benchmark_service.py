@@ -0,0 +1,111 @@
+# benchmark_service.py
+#
+# Starts the scoring service in-process on top of the fake search backend from benchmark_pipeline,
+# then measures request latency from concurrent keep-alive clients. Run from the repository root:
+#
+#   python -m scripts.benchmark_service --requests 500 --clients 8 --latency-ms 150
+#   python -m scripts.benchmark_service --batch-size 20 --unix-socket /tmp/seo.sock
+
+import argparse
+import http.client
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from google_search_seo.api_manager import SerpAPI, ResponseCache
+from google_search_seo.instrumentation import metrics
+from google_search_seo.service import ScoringService, make_server
+from scripts.benchmark_pipeline import make_fake_search, synthetic_accounts
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, path):
+
+        super().__init__('localhost')
+        self.path = path
+
+
+    def connect(self):
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def open_connection(server, unix_socket):
+
+    if unix_socket:
+        return UnixHTTPConnection(unix_socket)
+    return http.client.HTTPConnection(*server.server_address[:2])
+
+
+def run_client(server, unix_socket, bodies):
+
+    # One keep-alive connection per client, as a CRM integration would hold
+    connection = open_connection(server, unix_socket)
+    latencies = []
+    for body in bodies:
+        start = time.perf_counter()
+        connection.request('POST', '/score', body=json.dumps(body), headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"Service answered {response.status}")
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+    return latencies
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark the scoring service against a local fake SerpAPI.")
+    parser.add_argument('--requests', type=int, default=500, help="Requests to send in total")
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent client connections")
+    parser.add_argument('--batch-size', type=int, default=1, help="Accounts per request")
+    parser.add_argument('--repeat-fraction', type=float, default=0.5,
+                        help="Share of requests for accounts already checked (served from the warm cache)")
+    parser.add_argument('--latency-ms', type=float, default=150.0, help="Simulated latency per search")
+    parser.add_argument('--workers', type=int, default=16, help="Service search workers")
+    parser.add_argument('--unix-socket', help="Serve on this Unix socket instead of an ephemeral TCP port")
+    args = parser.parse_args()
+
+    metrics.enabled = True
+    scraper_api = SerpAPI("benchmark", cache=ResponseCache(':memory:'),
+                          search_client=make_fake_search(args.latency_ms / 1000))
+    service = ScoringService(scraper_api, max_workers=args.workers)
+    server = make_server(service, port=0, unix_socket=args.unix_socket)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # A fixed pool of accounts, so the repeat fraction controls how often the cache answers
+    n_accounts = max(1, int(args.requests * args.batch_size * (1 - args.repeat_fraction)))
+    accounts = synthetic_accounts(n_accounts)
+    bodies = [accounts[i % n_accounts] if args.batch_size == 1 else
+              [accounts[(i * args.batch_size + j) % n_accounts] for j in range(args.batch_size)]
+              for i in range(args.requests)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.clients) as executor:
+        client_latencies = executor.map(lambda i: run_client(server, args.unix_socket, bodies[i::args.clients]),
+                                        range(args.clients))
+        latencies = np.array([latency for client in client_latencies for latency in client])
+    total = time.perf_counter() - start
+
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+    counters = metrics.to_dict()['counters']
+    print(f"{args.requests:,} requests x {args.batch_size} accounts from {args.clients} clients in {total:.2f}s "
+          f"({args.requests / total:,.0f} requests/s)")
+    print(f"  latency p50 {np.percentile(latencies, 50) * 1000:.1f} ms, p95 {np.percentile(latencies, 95) * 1000:.1f} ms, "
+          f"p99 {np.percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"  searches {counters.get('api_searches', 0)}, cache hits {counters.get('cache_hits', 0)}, "
+          f"coalesced {counters.get('coalesced_requests', 0)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+# test_api_manager.py
+#
+# Unit tests for the response cache and for the rate limiter and retry policy of SerpAPI, run against
+# in-process transports.
+
+import time
+
+import pytest
+
+from google_search_seo.api_manager import ResponseCache, RetryableSearchError, SearchError, SerpAPI, TokenBucket
+
+
+class FlakyTransport():
+    """Answers with an error payload for the first `failures` searches, then with a result."""
+
+    def __init__(self, failures, error="Too many requests, try again later"):
+
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+
+    def search(self, params):
+
+        self.calls += 1
+        if self.calls <= self.failures:
+            return {'error': self.error}
+        return {'organic_results': []}
+
+
+    def close(self):
+
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+
+    # A wall clock the test moves by hand, so cache timestamps are exact
+    now = [1000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+
+    # Record backoff delays instead of sleeping through them
+    delays = []
+    monkeypatch.setattr(time, 'sleep', delays.append)
+    return delays
+
+
+def test_cache_key_ignores_api_key_case_and_spacing():
+
+    params = {'q': "Niki's  Pizza 1 Main St", 'location': 'Austin', 'api_key': 'one'}
+    same = {'q': "niki's pizza 1 main st ", 'location': 'AUSTIN', 'api_key': 'two'}
+
+    assert ResponseCache.make_key(params) == ResponseCache.make_key(same)
+    assert ResponseCache.make_key(params) != ResponseCache.make_key({**params, 'start': 10})
+
+
+def test_cache_entries_expire_after_their_ttl(tmp_path, clock):
+
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), ttl_seconds=10)
+    cache.set('key', {'q': 'pizza'}, {'organic_results': []})
+
+    clock[0] += 10
+    assert cache.get('key') == {'organic_results': []}
+    clock[0] += 1
+    assert cache.get('key') is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_the_least_recently_used_entry(tmp_path, clock):
+
+    # Hits are only noted in memory here, so eviction must flush them first to see that 'a' was read
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), max_entries=2, access_flush_seconds=3600)
+    for key in ('a', 'b'):
+        clock[0] += 1
+        cache.set(key, {'q': key}, {'q': key})
+    clock[0] += 1
+    cache.get('a')
+    clock[0] += 1
+    cache.set('c', {'q': 'c'}, {'q': 'c'})
+
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == {'q': 'a'} and cache.get('c') == {'q': 'c'}
+
+
+def test_cache_access_times_survive_a_reopen(tmp_path, clock):
+
+    path = str(tmp_path / 'cache.sqlite')
+    cache = ResponseCache(path, access_flush_seconds=3600)
+    for key in ('a', 'b'):
+        clock[0] += 1
+        cache.set(key, {'q': key}, {'q': key})
+    clock[0] += 1
+    cache.get('a')
+    cache.close()
+
+    # The hit on 'a' was written on close, so 'b' is now the least recently used
+    reopened = ResponseCache(path, max_entries=2)
+    clock[0] += 1
+    reopened.set('c', {'q': 'c'}, {'q': 'c'})
+    assert reopened.get('b') is None
+    assert reopened.get('a') == {'q': 'a'}
+
+
+def test_token_bucket_allows_a_burst_then_paces_at_its_rate():
+
+    bucket = TokenBucket(rate=50, capacity=5)
+
+    started_at = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    burst_seconds = time.monotonic() - started_at
+    for _ in range(10):
+        bucket.acquire()
+    total_seconds = time.monotonic() - started_at
+
+    assert burst_seconds < 0.05
+    assert total_seconds >= 10 / 50 * 0.9
+
+
+def test_transient_errors_are_retried_with_bounded_backoff(sleeps):
+
+    transport = FlakyTransport(failures=3)
+    scraper_api = SerpAPI("test", max_retries=3, backoff_base=1.0, backoff_max=3.0, transport=transport)
+
+    assert scraper_api.search({'q': 'pizza'}) == {'organic_results': []}
+    assert transport.calls == 4
+    assert len(sleeps) == 3
+    assert all(0 <= delay <= min(3.0, 1.0 * 2 ** attempt) for attempt, delay in enumerate(sleeps))
+
+
+def test_retries_stop_after_max_retries(sleeps):
+
+    transport = FlakyTransport(failures=10)
+    scraper_api = SerpAPI("test", max_retries=2, transport=transport)
+
+    with pytest.raises(RetryableSearchError):
+        scraper_api.search({'q': 'pizza'})
+    assert transport.calls == 3
+    assert len(sleeps) == 2
+
+
+def test_error_payloads_are_not_retried(sleeps):
+
+    transport = FlakyTransport(failures=1, error="Invalid API key.")
+    scraper_api = SerpAPI("invalid", transport=transport)
+
+    with pytest.raises(SearchError):
+        scraper_api.search({'q': 'pizza'})
+    assert transport.calls == 1
+    assert sleeps == []
@@ -0,0 +1,54 @@
+# test_cli.py
+#
+# Command-line entry points that need no search backend.
+
+import json
+
+import pytest
+
+from google_search_seo.cli import main
+from google_search_seo.domain_index import DomainIndex
+
+
+@pytest.fixture
+def index_path(tmp_path):
+
+    path = str(tmp_path / 'domains.json')
+    domain_index = DomainIndex(path)
+    domain_index.add('nikis pizza|1 main st|austin', ['nikispizza.com', 'yelp.com'])
+    domain_index.add('nikis pizza|9 oak st|austin', ['nikispizza.com', 'nikis-pizza.net', 'yelp.com'])
+    domain_index.add('rosas bar|3 elm st|austin', ['yelp.com'])
+    domain_index.save()
+    return path
+
+
+def printed_lines(capsys):
+
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_index_lists_the_accounts_sharing_a_domain(index_path, capsys):
+
+    main(['index', '--domain-index', index_path, '--domain', 'https://order.NikisPizza.com/menu',
+          '--domain', 'unknown.com'])
+
+    assert printed_lines(capsys) == [
+        {'domain': 'nikispizza.com', 'accounts': ['nikis pizza|1 main st|austin', 'nikis pizza|9 oak st|austin']},
+        {'domain': 'unknown.com', 'accounts': []},
+    ]
+
+
+def test_index_lists_the_most_shared_domains(index_path, capsys):
+
+    main(['index', '--domain-index', index_path, '--top', '2'])
+
+    assert printed_lines(capsys) == [
+        {'domain': 'yelp.com', 'account_count': 3},
+        {'domain': 'nikispizza.com', 'account_count': 2},
+    ]
+
+
+def test_index_needs_a_query(index_path):
+
+    with pytest.raises(SystemExit):
+        main(['index', '--domain-index', index_path])
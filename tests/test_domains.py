@@ -0,0 +1,72 @@
+# test_domains.py
+
+import pytest
+
+from google_search_seo.blocklist import load_blocklist
+from google_search_seo.domains import PublicSuffixTrie, registrable_domain, registrable_domain_of_link
+
+
+@pytest.mark.parametrize('host, expected', [
+    ('order.niki.com', 'niki.com'),
+    ('niki.com', 'niki.com'),
+    ('foo.bar.co.uk', 'bar.co.uk'),
+    ('bar.co.uk', 'bar.co.uk'),
+    ('co.uk', 'co.uk'),
+    ('WWW.Example.COM.', 'example.com'),
+])
+def test_registrable_domain_icann(host, expected):
+
+    assert registrable_domain(host) == expected
+
+
+def test_wildcard_and_exception_rules():
+
+    # *.kawasaki.jp makes every label under kawasaki.jp a suffix, except city.kawasaki.jp
+    assert registrable_domain('shop.foo.kawasaki.jp') == 'shop.foo.kawasaki.jp'
+    assert registrable_domain('a.b.foo.kawasaki.jp') == 'b.foo.kawasaki.jp'
+    assert registrable_domain('www.city.kawasaki.jp') == 'city.kawasaki.jp'
+    assert registrable_domain('city.kawasaki.jp') == 'city.kawasaki.jp'
+
+
+@pytest.mark.parametrize('host, expected', [
+    ('joes.wixsite.com', 'joes.wixsite.com'),
+    ('www.joes.blogspot.com', 'joes.blogspot.com'),
+    ('joes-pizza.myshopify.com', 'joes-pizza.myshopify.com'),
+])
+def test_private_suffixes_keep_hosted_sites_apart(host, expected):
+
+    assert registrable_domain(host) == expected
+
+
+@pytest.mark.parametrize('host', ['192.168.0.1', '10.0.0.12', '::1', '2001:db8::1'])
+def test_ip_addresses_are_returned_unchanged(host):
+
+    assert registrable_domain(host) == host
+
+
+def test_registrable_domain_of_link():
+
+    assert registrable_domain_of_link('https://user@order.niki.com:8443/menu?x=1#top') == 'niki.com'
+    assert registrable_domain_of_link('niki.co.uk/menu') == 'niki.co.uk'
+    assert registrable_domain_of_link(None) is None
+
+
+def test_unlisted_tld_falls_back_to_one_label():
+
+    trie = PublicSuffixTrie(['com', '*.kawasaki.jp', '!city.kawasaki.jp'])
+    assert trie.suffix_length(['www', 'example', 'invalidtld']) == 1
+    assert trie.suffix_length(['www', 'city', 'kawasaki', 'jp']) == 2
+    assert trie.suffix_length(['www', 'foo', 'kawasaki', 'jp']) == 3
+
+
+@pytest.mark.parametrize('host, blocked', [
+    ('joes.square.site', True),
+    ('joes.business.site', True),
+    ('squareup.com', False),
+    ('www.yelp.com', True),
+    ('yelp.example.com', False),
+    ('order.niki.com', False),
+])
+def test_blocklist_label_keywords(host, blocked):
+
+    assert load_blocklist().matches_host(host) == blocked
@@ -0,0 +1,89 @@
+# test_output.py
+#
+# Layout of the Parquet output: row groups of bounded size, a dictionary-encoded domain column, and a file
+# that only appears, footer and all, on close.
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from google_search_seo.output import JsonLinesOutputWriter, ParquetOutputWriter, open_output_writer
+
+
+def scored_frame(start, n):
+
+    # Few distinct domains across many rows, as in real output
+    domains = ['nikispizza.com', 'nikis-pizza.net', 'nikispizzaaustin.com', 'pizza-nikis.co']
+    return pd.DataFrame({
+        'input_restaurant': [f"Niki's Pizza {i} Main St" for i in range(start, start + n)],
+        'input_city': ['Austin'] * n,
+        'unique_domain_list': [[domains[i % 4], domains[(i + 1) % 4]] for i in range(start, start + n)],
+        'unique_domain_count': [2] * n,
+    })
+
+
+def domain_column(metadata, row_group):
+
+    row_group_metadata = metadata.row_group(row_group)
+    for index in range(row_group_metadata.num_columns):
+        column = row_group_metadata.column(index)
+        if column.path_in_schema.startswith('unique_domain_list'):
+            return column
+
+
+def test_open_output_writer_picks_the_sink_by_extension(tmp_path):
+
+    with open_output_writer(str(tmp_path / 'out.parquet')) as writer:
+        assert isinstance(writer, ParquetOutputWriter)
+    with open_output_writer(str(tmp_path / 'out.jsonl')) as writer:
+        assert isinstance(writer, JsonLinesOutputWriter)
+
+
+def test_parquet_output_is_written_in_bounded_row_groups(tmp_path):
+
+    path = str(tmp_path / 'out.parquet')
+    frames = [scored_frame(start, 30) for start in range(0, 300, 30)]
+    with ParquetOutputWriter(path, row_group_size=50) as writer:
+        for df in frames:
+            writer.write(df)
+        # Nothing is visible under the final name until the footer is written
+        assert not os.path.exists(path)
+
+    metadata = pq.ParquetFile(path).metadata
+    group_sizes = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+    assert sum(group_sizes) == writer.rows_written == 300
+    assert metadata.num_row_groups > 1
+    assert max(group_sizes) <= 50
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_parquet_domain_column_is_dictionary_encoded(tmp_path):
+
+    path = str(tmp_path / 'out.parquet')
+    expected = pd.concat([scored_frame(0, 100), scored_frame(100, 100)], ignore_index=True)
+    with ParquetOutputWriter(path) as writer:
+        writer.write(expected.iloc[:100])
+        writer.write(expected.iloc[100:])
+
+    table = pq.read_table(path, memory_map=True)
+    assert table.schema.field('unique_domain_list').type == pa.list_(pa.dictionary(pa.int32(), pa.string()))
+    assert any('DICTIONARY' in encoding for encoding in domain_column(pq.ParquetFile(path).metadata, 0).encodings)
+
+    df = table.to_pandas()
+    assert [list(domains) for domains in df['unique_domain_list']] == expected['unique_domain_list'].tolist()
+    # unique_domain_count is stored as int32
+    pd.testing.assert_frame_equal(df.drop(columns=['unique_domain_list']),
+                                  expected.drop(columns=['unique_domain_list']), check_dtype=False)
+
+
+def test_empty_parquet_output_is_still_readable(tmp_path):
+
+    path = str(tmp_path / 'out.parquet')
+    with ParquetOutputWriter(path):
+        pass
+
+    table = pq.read_table(path)
+    assert table.num_rows == 0
+    assert 'unique_domain_list' in table.schema.names
@@ -0,0 +1,305 @@
+# test_pipeline.py
+#
+# End-to-end runs of the batch, streaming and refresh paths against the deterministic fake search
+# backend from scripts/benchmark_pipeline.py, so no test ever reaches SerpAPI.
+
+import pandas as pd
+import pytest
+
+from google_search_seo.api_manager import ResponseCache, SerpAPI
+from google_search_seo.checkpoint import RefreshManifest, RunJournal
+from google_search_seo.cli import write_output
+from google_search_seo.helpers import (
+    account_key,
+    batch_process,
+    merge_shard_outputs,
+    refresh_process,
+    rescore_raw_results,
+    stream_batch_process
+)
+from google_search_seo.raw_store import RawResultStore
+from scripts.benchmark_pipeline import make_fake_search, synthetic_accounts
+
+
+N_ACCOUNTS = 120
+N_DUPLICATES = 15
+
+
+def make_scraper_api(**kwargs):
+
+    return SerpAPI("test", search_client=make_fake_search(), **kwargs)
+
+
+def write_accounts_csv(path, accounts):
+
+    pd.DataFrame({
+        'Account Name': [account['account_name'] for account in accounts],
+        'Billing Address Line 1': [account['billing_address_line_1'] for account in accounts],
+        'Billing City': [account['billing_city'] for account in accounts],
+    }).to_csv(path, index=False)
+    return path
+
+
+def write_accounts_with_ids(path, accounts):
+
+    write_accounts_csv(path, accounts)
+    df = pd.read_csv(path)
+    df.insert(0, 'Account ID', range(len(df)))
+    df.to_csv(path, index=False)
+    return path
+
+
+def with_duplicates(accounts):
+
+    # Re-imported rows that differ only in case or spacing, i.e. the same account key
+    duplicates = [{**account, 'account_name': account['account_name'].upper(),
+                   'billing_address_line_1': account['billing_address_line_1'].replace(' ', '  ')}
+                  for account in accounts[:N_DUPLICATES]]
+    return accounts + duplicates
+
+
+def query_of(account):
+
+    return f"{account['account_name']} {account['billing_address_line_1']}"
+
+
+def as_records(df):
+
+    return df.to_json(orient='records')
+
+
+@pytest.fixture
+def accounts_csv(tmp_path):
+
+    return write_accounts_csv(tmp_path / 'accounts.csv', with_duplicates(synthetic_accounts(N_ACCOUNTS)))
+
+
+@pytest.fixture
+def sample_n():
+
+    return N_ACCOUNTS + N_DUPLICATES
+
+
+def test_duplicates_share_one_search_and_keep_their_own_query_text(accounts_csv, sample_n):
+
+    scraper_api = make_scraper_api()
+    df = batch_process(accounts_csv, scraper_api, sample_n)
+
+    assert scraper_api.searches_used == N_ACCOUNTS
+    duplicated = with_duplicates(synthetic_accounts(N_ACCOUNTS))
+    originals = {query_of(account) for account in duplicated[:N_DUPLICATES]}
+    variants = {query_of(account) for account in duplicated[N_ACCOUNTS:]}
+    restaurants = set(df['input_restaurant'])
+    assert len(originals & restaurants) == len(variants & restaurants) > 0
+
+
+def test_account_key_ignores_case_and_spacing():
+
+    row = {'account_name': "Niki's  Pizza", 'billing_address_line_1': '1 Main St', 'billing_city': 'Austin '}
+    same = {'account_name': "NIKI'S PIZZA", 'billing_address_line_1': ' 1 main st', 'billing_city': 'austin'}
+
+    assert account_key(row) == account_key(same)
+
+
+def test_process_pool_matches_serial(accounts_csv, sample_n):
+
+    serial = batch_process(accounts_csv, make_scraper_api(), sample_n, chunk_size=40)
+    parallel = batch_process(accounts_csv, make_scraper_api(), sample_n, chunk_size=40, processes=2)
+
+    assert as_records(parallel) == as_records(serial)
+
+
+def test_streamed_process_pool_matches_serial(tmp_path, accounts_csv, sample_n):
+
+    serial_path, parallel_path = tmp_path / 'serial.jsonl', tmp_path / 'parallel.jsonl'
+    stream_batch_process(accounts_csv, make_scraper_api(), sample_n, str(serial_path), max_workers=4)
+    stream_batch_process(accounts_csv, make_scraper_api(), sample_n, str(parallel_path), max_workers=4, processes=2)
+
+    assert parallel_path.read_text() == serial_path.read_text()
+
+
+def test_rescoring_stored_raw_results_reproduces_the_batch_output(tmp_path, accounts_csv, sample_n):
+
+    raw_store = RawResultStore(str(tmp_path / 'raw_results'))
+    batch = batch_process(accounts_csv, make_scraper_api(), sample_n, chunk_size=40,
+                          raw_writer=raw_store.writer('run-1'))
+
+    assert raw_store.runs() == ['run-1']
+    assert as_records(rescore_raw_results(raw_store, 'run-1')) == as_records(batch)
+    assert as_records(rescore_raw_results(raw_store, 'run-1', processes=2)) == as_records(batch)
+
+
+def test_journal_does_not_change_output(tmp_path, accounts_csv, sample_n):
+
+    plain = batch_process(accounts_csv, make_scraper_api(), sample_n)
+    journaled = batch_process(accounts_csv, make_scraper_api(), sample_n,
+                              journal=RunJournal(str(tmp_path / 'run' / 'journal.jsonl')))
+
+    assert as_records(journaled) == as_records(plain)
+
+
+def test_journal_resume_after_budget_stop(tmp_path, accounts_csv, sample_n):
+
+    uninterrupted = batch_process(accounts_csv, make_scraper_api(), sample_n, chunk_size=25)
+
+    # Both runs share a response cache, as CLI runs do
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    journal_path = str(tmp_path / 'run' / 'journal.jsonl')
+    first = make_scraper_api(search_budget=50, cache=cache)
+    batch_process(accounts_csv, first, sample_n, chunk_size=25, journal=RunJournal(journal_path))
+    assert first.searches_used == 50
+
+    second = make_scraper_api(cache=cache)
+    resumed = batch_process(accounts_csv, second, sample_n, chunk_size=25, journal=RunJournal(journal_path))
+
+    assert second.searches_used == N_ACCOUNTS - 50
+    assert as_records(resumed) == as_records(uninterrupted)
+
+
+def test_streamed_journal_resume_after_budget_stop(tmp_path, accounts_csv, sample_n):
+
+    uninterrupted_path = tmp_path / 'uninterrupted.jsonl'
+    stream_batch_process(accounts_csv, make_scraper_api(), sample_n, str(uninterrupted_path), max_workers=4)
+
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    journal_path = str(tmp_path / 'run' / 'journal.jsonl')
+    resumed_path = tmp_path / 'resumed.jsonl'
+    stream_batch_process(accounts_csv, make_scraper_api(search_budget=50, cache=cache), sample_n, str(resumed_path),
+                         max_workers=4, journal=RunJournal(journal_path))
+    stream_batch_process(accounts_csv, make_scraper_api(cache=cache), sample_n, str(resumed_path), max_workers=4,
+                         journal=RunJournal(journal_path))
+
+    assert resumed_path.read_text() == uninterrupted_path.read_text()
+
+
+def test_error_payload_is_not_journaled_cached_or_scored(tmp_path, accounts_csv, sample_n):
+
+    invalid_key = make_fake_search(replay_responses=[{'error': "Invalid API key. Your API key should be here: "
+                                                                "https://serpapi.com/manage-api-key"}])
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    journal_path = str(tmp_path / 'run' / 'journal.jsonl')
+    rejected = batch_process(accounts_csv, SerpAPI("invalid", cache=cache, search_client=invalid_key), sample_n,
+                             journal=RunJournal(journal_path))
+
+    assert len(rejected) == 0
+    assert len(RunJournal(journal_path)) == 0
+    assert len(cache) == 0
+
+    resumed = batch_process(accounts_csv, make_scraper_api(cache=cache), sample_n, journal=RunJournal(journal_path))
+    assert as_records(resumed) == as_records(batch_process(accounts_csv, make_scraper_api(), sample_n))
+
+
+def test_offline_run_skips_uncached_accounts_and_leaves_them_for_resume(tmp_path, accounts_csv, sample_n):
+
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    batch_process(accounts_csv, make_scraper_api(search_budget=50, cache=cache), sample_n)
+
+    journal_path = str(tmp_path / 'run' / 'journal.jsonl')
+    offline = make_scraper_api(cache=cache, offline=True)
+    batch_process(accounts_csv, offline, sample_n, journal=RunJournal(journal_path))
+    assert offline.searches_used == 0
+    assert 50 <= len(RunJournal(journal_path)) < sample_n
+
+    online = make_scraper_api(cache=cache)
+    resumed = batch_process(accounts_csv, online, sample_n, journal=RunJournal(journal_path))
+    assert online.searches_used == N_ACCOUNTS - 50
+    assert as_records(resumed) == as_records(batch_process(accounts_csv, make_scraper_api(), sample_n))
+
+
+def test_sharded_runs_merge_into_single_node_output(tmp_path, accounts_csv, sample_n):
+
+    single_node = batch_process(accounts_csv, make_scraper_api(), sample_n)
+
+    shard_paths = []
+    for shard_index in range(3):
+        shard_path = str(tmp_path / f"shard-{shard_index:05d}-of-00003.jsonl")
+        write_output(batch_process(accounts_csv, make_scraper_api(), sample_n, shard=(shard_index, 3)), shard_path)
+        shard_paths.append(shard_path)
+
+    assert as_records(merge_shard_outputs(shard_paths)) == as_records(single_node)
+
+
+def test_streamed_shards_merge_into_streamed_single_node_output(tmp_path, accounts_csv, sample_n):
+
+    single_path = tmp_path / 'single.jsonl'
+    stream_batch_process(accounts_csv, make_scraper_api(), sample_n, str(single_path), max_workers=4)
+
+    shard_paths = [str(tmp_path / f"shard-{shard_index:05d}-of-00002.jsonl") for shard_index in range(2)]
+    for shard_index, shard_path in enumerate(shard_paths):
+        stream_batch_process(accounts_csv, make_scraper_api(), sample_n, shard_path, max_workers=4,
+                             shard=(shard_index, 2))
+
+    merged_path = tmp_path / 'merged.jsonl'
+    write_output(merge_shard_outputs(shard_paths), str(merged_path))
+    assert merged_path.read_text() == single_path.read_text()
+
+
+def test_refresh_carries_unchanged_accounts_forward(tmp_path):
+
+    accounts = synthetic_accounts(N_ACCOUNTS)
+    manifest_path = str(tmp_path / 'manifest.jsonl')
+    refresh_process(write_accounts_csv(tmp_path / 'v1.csv', accounts), make_scraper_api(),
+                    RefreshManifest(manifest_path))
+
+    # One edited account and one new account
+    edited = [dict(account) for account in accounts] + synthetic_accounts(N_ACCOUNTS + 1)[N_ACCOUNTS:]
+    edited[3]['billing_address_line_1'] = '1 Other St'
+    edited_csv = write_accounts_csv(tmp_path / 'v2.csv', edited)
+
+    scraper_api = make_scraper_api()
+    refreshed = refresh_process(edited_csv, scraper_api, RefreshManifest(manifest_path))
+    from_scratch = refresh_process(edited_csv, make_scraper_api(), RefreshManifest(str(tmp_path / 'fresh.jsonl')))
+
+    assert scraper_api.searches_used == 2
+    assert as_records(refreshed) == as_records(from_scratch)
+
+
+def test_refresh_keeps_one_manifest_entry_per_identity(tmp_path, accounts_csv):
+
+    manifest_path = tmp_path / 'manifest.jsonl'
+    first = refresh_process(accounts_csv, make_scraper_api(), RefreshManifest(str(manifest_path)))
+
+    scraper_api = make_scraper_api()
+    second = refresh_process(accounts_csv, scraper_api, RefreshManifest(str(manifest_path)))
+
+    assert len(manifest_path.read_text().splitlines()) == N_ACCOUNTS
+    assert scraper_api.searches_used == 0
+    assert as_records(second) == as_records(first)
+
+
+def test_refresh_id_column_is_standardized(tmp_path):
+
+    csv_path = write_accounts_with_ids(tmp_path / 'accounts.csv', synthetic_accounts(20))
+
+    manifest = RefreshManifest(str(tmp_path / 'manifest.jsonl'))
+    refresh_process(csv_path, make_scraper_api(), manifest, id_column='Account ID')
+
+    assert sorted(manifest.entries) == [str(account_id) for account_id in sorted(range(20), key=str)]
+
+
+def test_refresh_leaves_unsearched_edits_out_and_retries_them(tmp_path):
+
+    accounts = synthetic_accounts(20)
+    manifest_path = str(tmp_path / 'manifest.jsonl')
+    refresh_process(write_accounts_with_ids(tmp_path / 'v1.csv', accounts), make_scraper_api(),
+                    RefreshManifest(manifest_path), id_column='Account ID')
+    old_entry = RefreshManifest(manifest_path).entries['3']
+
+    # The same account id with a new address, refreshed with no searches left
+    edited = [dict(account) for account in accounts]
+    edited[3]['billing_address_line_1'] = '1 Other St'
+    edited_csv = write_accounts_with_ids(tmp_path / 'v2.csv', edited)
+    stopped = refresh_process(edited_csv, make_scraper_api(search_budget=0), RefreshManifest(manifest_path),
+                              id_column='Account ID')
+
+    assert query_of(edited[3]) not in set(stopped['input_restaurant'])
+    assert query_of(accounts[3]) not in set(stopped['input_restaurant'])
+    assert RefreshManifest(manifest_path).entries['3'] == old_entry
+
+    scraper_api = make_scraper_api()
+    retried = refresh_process(edited_csv, scraper_api, RefreshManifest(manifest_path), id_column='Account ID')
+    from_scratch = refresh_process(edited_csv, make_scraper_api(), RefreshManifest(str(tmp_path / 'fresh.jsonl')),
+                                   id_column='Account ID')
+
+    assert scraper_api.searches_used == 1
+    assert as_records(retried) == as_records(from_scratch)
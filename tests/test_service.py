@@ -0,0 +1,90 @@
+# test_service.py
+#
+# Runs the scoring service on an ephemeral port against the fake search backend and talks to it over HTTP.
+
+import http.client
+import json
+import threading
+
+import pytest
+
+from google_search_seo.api_manager import SerpAPI
+from google_search_seo.service import ScoringService, make_server
+from scripts.benchmark_pipeline import make_fake_search, synthetic_accounts
+
+
+@pytest.fixture
+def server():
+
+    service = ScoringService(SerpAPI("test", search_client=make_fake_search()), max_workers=4)
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+@pytest.fixture
+def connection(server):
+
+    host, port = server.server_address[:2]
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    yield connection
+    connection.close()
+
+
+def post(connection, path, body, headers=None):
+
+    connection.request('POST', path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_scores_a_single_account(connection):
+
+    account = synthetic_accounts(1)[0]
+    status, verdict = post(connection, '/score', json.dumps(account))
+
+    assert status == 200
+    assert isinstance(verdict['fractured'], bool)
+
+
+def test_scores_a_batch_in_order(connection, server):
+
+    accounts = synthetic_accounts(5)
+    status, verdicts = post(connection, '/score', json.dumps(accounts))
+    singles = [server.service.score_account(account) for account in accounts]
+
+    assert status == 200
+    assert verdicts == json.loads(json.dumps(singles))
+
+
+def test_bad_requests_get_400(connection):
+
+    assert post(connection, '/score', '{not json')[0] == 400
+    assert post(connection, '/score', json.dumps({'billing_city': 'Austin'}))[0] == 400
+
+
+def test_invalid_content_length_gets_400_and_closes(connection):
+
+    connection.putrequest('POST', '/score')
+    connection.putheader('Content-Length', 'ten')
+    connection.endheaders()
+    response = connection.getresponse()
+
+    assert response.status == 400
+    assert response.getheader('Connection') == 'close'
+    response.read()
+
+
+def test_keep_alive_connection_survives_rejected_requests(connection):
+
+    account = json.dumps(synthetic_accounts(1)[0])
+    assert post(connection, '/unknown', account)[0] == 404
+    assert post(connection, '/score', '{not json')[0] == 400
+    sock = connection.sock
+
+    assert post(connection, '/score', account)[0] == 200
+    assert connection.sock is sock
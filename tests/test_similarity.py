@@ -0,0 +1,61 @@
+# test_similarity.py
+#
+# The default difflib backend prunes pairs with upper bounds before paying for a full ratio; its decisions
+# must stay identical to comparing every pair with SequenceMatcher.
+
+import difflib
+import random
+import string
+
+import pytest
+
+from google_search_seo.similarity import DEFAULT_THRESHOLD, difflib_has_similar_pair, has_similar_pair
+
+
+def reference_has_similar_pair(domain_list, threshold=DEFAULT_THRESHOLD):
+
+    return any(difflib.SequenceMatcher(None, domain_list[i], domain_list[j]).ratio() > threshold
+               for i in range(len(domain_list)) for j in range(i + 1, len(domain_list)))
+
+
+def random_domains(rng, n):
+
+    # A small alphabet and shared stems give plenty of pairs on both sides of the threshold
+    stems = ['pizza', 'nikis', 'grill', 'tacos', 'bistro']
+    domains = []
+    for _ in range(n):
+        stem = rng.choice(stems) + ''.join(rng.choice('abcde') for _ in range(rng.randint(0, 6)))
+        domains.append(f"{stem}.{rng.choice(['com', 'net', 'co'])}")
+    return domains
+
+
+@pytest.mark.parametrize('threshold', [0.5, DEFAULT_THRESHOLD, 0.8, 0.9])
+def test_difflib_backend_matches_sequence_matcher(threshold):
+
+    rng = random.Random(threshold)
+    for _ in range(300):
+        domain_list = random_domains(rng, rng.randint(0, 5))
+        assert difflib_has_similar_pair(domain_list, threshold) == reference_has_similar_pair(domain_list, threshold)
+
+
+def test_difflib_backend_matches_sequence_matcher_on_unrelated_strings():
+
+    rng = random.Random(0)
+    for _ in range(300):
+        domain_list = [''.join(rng.choice(string.ascii_lowercase[:6]) for _ in range(rng.randint(1, 12)))
+                       for _ in range(rng.randint(2, 4))]
+        assert difflib_has_similar_pair(domain_list) == reference_has_similar_pair(domain_list)
+
+
+def test_ratio_exactly_at_threshold_is_not_similar():
+
+    # 'abcd' vs 'abce' has a ratio of exactly 0.75, and only ratios above the threshold count
+    assert difflib.SequenceMatcher(None, 'abcd', 'abce').ratio() == 0.75
+    assert not has_similar_pair(['abcd', 'abce'], threshold=0.75)
+    assert has_similar_pair(['abcd', 'abce'], threshold=0.74)
+
+
+def test_unknown_backend_is_rejected():
+
+    with pytest.raises(ValueError):
+        has_similar_pair(['a.com', 'b.com'], backend='soundex')